@@ -0,0 +1,76 @@
+"""
+Benchmarks for notification generation.  Run them with `python manage.py run_benchmarks notification_fan_out`.
+
+These create users and groups, so each group size runs inside a transaction which is rolled back afterwards.
+Email delivery is queued as a django-q task, so we run the tasks synchronously, the way tests do, and time sending
+the emails along with creating the notifications.
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test.utils import override_settings
+
+from concord.utils.helpers import Client
+
+from groups.benchmarks import time_callable
+from accounts.models import Notification, NotificationsSettings
+from accounts.tasks import generate_notifications
+
+
+def generate_notifications_one_at_a_time(action):
+    """Fans out notifications the way generate_notifications did before it switched to bulk queries, with a
+    query per member for the user, another for their settings, and a save (and email) per notification."""
+    for member_pk in action.target.get_owner().roles.get_members():
+        user = User.objects.get(pk=member_pk)
+        if action.actor == user:
+            continue
+        if user.notify_settings.always_notify_everything:
+            notification = Notification(user=user, action=action, sent=False, notes="everything",
+                                        email_type=user.notify_settings.send_emails)
+            notification.save()
+
+
+def create_group_with_members(member_count):
+    """Creates a group whose members all want immediate notifications about everything, and returns the action
+    which added them."""
+
+    owner = User.objects.create_user(f"benchmark_owner_{member_count}", "benchmark@example.com", "benchmark")
+    members = User.objects.bulk_create(
+        [User(username=f"benchmark_{member_count}_{i}", email="benchmark@example.com") for i in range(member_count)])
+    NotificationsSettings.objects.bulk_create(
+        [NotificationsSettings(user_id=member.pk, send_emails="now", always_notify_everything=True)
+         for member in members])
+
+    client = Client(actor=owner)
+    community = client.Community.create_community(name=f"Benchmark group of {member_count}")
+    client.update_target_on_all(target=community)
+    action, result = client.Community.add_members_to_community(member_pk_list=[member.pk for member in members])
+    return action
+
+
+def benchmark_notification_fan_out(number=3, member_counts=(10, 100, 1000)):
+    """Compares creating and emailing notifications one at a time with creating them in bulk and emailing them in
+    batches, for groups of different sizes."""
+
+    results = []
+
+    with override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"), \
+            patch("mysite.settings.TESTING", True):
+        for member_count in member_counts:
+            with transaction.atomic():
+                action = create_group_with_members(member_count)
+                delete_notifications = lambda: Notification.objects.filter(action=action).delete()
+                for label, fan_out in [("one at a time", generate_notifications_one_at_a_time),
+                                       ("bulk", generate_notifications)]:
+                    seconds = time_callable(lambda: fan_out(action), number, teardown=delete_notifications)
+                    results.append((f"{label}, {member_count} members", seconds))
+                transaction.set_rollback(True)
+
+    return results
+
+
+BENCHMARKS = {
+    "notification_fan_out": benchmark_notification_fan_out
+}
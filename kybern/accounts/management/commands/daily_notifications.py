@@ -1,39 +1,46 @@
 """Management command which sends daily notifications."""
 
+from itertools import groupby
+
 from django.core.management.base import BaseCommand
 from django.template.loader import render_to_string
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection
 
 
 class Command(BaseCommand):
     help = 'Sends notifications as daily email.'
 
-    def handle(self, *args, **options):
-
+    def get_unsent_notifications(self):
+        """Streams unsent daily notifications, ordered so that each user's notifications are together."""
         from accounts.models import Notification
+        return Notification.objects.filter(email_type="day", sent=False).select_related("user", "action")\
+            .order_by("user_id", "pk").iterator()
+
+    def get_digest(self, user, notifications, connection):
 
-        user_notify_map = {}
+        ctx = {"user": user}
+        ctx["approval_notifications"] = [n for n in notifications if n.notes == "approval"]
+        ctx["creator_notifications"] = [n for n in notifications if n.notes == "creator"]
+        ctx["other_notifications"] = [n for n in notifications if n.notes == "everything"]
+        ctx["resolved_notifications"] = [n for n in notifications if n.notes == "resolved"]
 
-        # create map of unsent notifications
-        for notification in Notification.objects.filter(email_type="day"):
-            if not notification.sent:
-                if notification.user not in user_notify_map:
-                    user_notify_map[notification.user] = []
-                user_notify_map[notification.user].append(notification)
+        msg = render_to_string('emails/daily_notifications.html', ctx)
+        email = EmailMultiAlternatives("Notification from Kybern", msg, None, [user.email], connection=connection)
+        email.attach_alternative(msg, "text/html")
+        return email
 
-        for user, notifications in user_notify_map.items():
+    def handle(self, *args, **options):
+        """Sends one digest per user, marking that user's notifications as sent straight afterwards, so if the
+        command is interrupted, running it again picks up with the users who haven't been sent their digest."""
+
+        from accounts.models import Notification
 
-            if notifications:
+        with get_connection(fail_silently=False) as connection:
 
-                ctx = {"user": user}
-                ctx["approval_notifications"] = [n for n in notifications if n.notes == "approval"]
-                ctx["creator_notifications"] = [n for n in notifications if n.notes == "creator"]
-                ctx["other_notifications"] = [n for n in notifications if n.notes == "everything"]
-                ctx["resolved_notifications"] = [n for n in notifications if n.notes == "resolved"]
+            for user_pk, user_notifications in groupby(self.get_unsent_notifications(), key=lambda n: n.user_id):
 
-                msg = render_to_string('emails/daily_notifications.html', ctx)
-                send_mail("Notification from Kybern", msg, None, [user.email], fail_silently=False, html_message=msg)
+                notifications = list(user_notifications)
+                user = notifications[0].user
 
-                for notification in notifications:
-                    notification.sent = True
-                    notification.save()
+                self.get_digest(user, notifications, connection).send()
+                Notification.objects.filter(pk__in=[n.pk for n in notifications]).update(sent=True)
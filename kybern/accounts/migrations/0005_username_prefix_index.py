@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+# Case-insensitive prefix searches (username__istartswith) compare UPPER(username::text) with LIKE, which the unique
+# index on username can't serve.  Expression indexes aren't supported by Index until Django 3.2, so we use SQL.
+CREATE_INDEX = "CREATE INDEX auth_user_username_upper_prefix ON auth_user (UPPER(username::text) text_pattern_ops)"
+DROP_INDEX = "DROP INDEX IF EXISTS auth_user_username_upper_prefix"
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_INDEX)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_notificationssettings_always_notify_action_resolved'),
+        ('auth', '0011_update_proxy_permissions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_username_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='send_failed',
+            field=models.BooleanField(default=False),
+        ),
+    ]
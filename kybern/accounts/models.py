@@ -1,8 +1,10 @@
+import logging, smtplib
+
 from django.db import models
 from django.contrib.auth.models import User as DjangoUser
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.core.mail import send_mail
+from django.core.mail import get_connection, EmailMultiAlternatives
 from django.urls import reverse
 from django.template.loader import render_to_string
 
@@ -12,6 +14,9 @@ from django_q.tasks import schedule
 from concord.actions.models import Action
 
 
+logger = logging.getLogger(__name__)
+
+
 class ActiveUsersManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset().filter(is_active=True)
@@ -65,6 +70,7 @@ class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     action = models.ForeignKey(Action, on_delete=models.CASCADE)
     sent = models.BooleanField(default=False)
+    send_failed = models.BooleanField(default=False)
     EMAIL_CHOICES = [
         ('now', 'Immediately'),
         ('day', 'Daily'),
@@ -80,7 +86,12 @@ class Notification(models.Model):
 
 @receiver(post_save, sender=Action)
 def create_or_update_notification(sender, instance, created, **kwargs):
-    """For now, we only notify on action creation, but we probably want to notify on update eventually."""
+    """Notifies on action creation and resolution, and pushes the change to browsers listening to the group's events
+    once it commits.  An action is only saved as waiting once the pipeline has created its conditions, so that's when
+    we check who may be eligible to approve it."""
+
+    from groups.events import publish_action_event
+    publish_action_event(instance, created)
 
     from mysite.settings import TESTING
     if TESTING:
@@ -89,17 +100,59 @@ def create_or_update_notification(sender, instance, created, **kwargs):
     if created:
         async_task('accounts.tasks.generate_notifications', instance)
     else:
+        if instance.status == "waiting":
+            async_task('accounts.tasks.generate_approval_notifications', instance)
         async_task('accounts.tasks.create_resolved_notification', instance)
 
 
-def send_notification_email(notification):
+def get_notification_email(notification, connection=None):
     msg = render_to_string('emails/immediate_notifications.html', {"notification": notification})
-    send_mail("Notification from Kybern", msg, None, [notification.user.email], fail_silently=False, html_message=msg)
-    notification.sent = True
-    notification.save()
+    email = EmailMultiAlternatives("Notification from Kybern", msg, None, [notification.user.email],
+                                   connection=connection)
+    email.attach_alternative(msg, "text/html")
+    return email
+
+
+# errors which mean the server rejected a single message, rather than that we can't send email at all
+MESSAGE_SEND_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError, ValueError)
+
+
+def send_notification_emails(notifications):
+    """Sends immediate emails for multiple notifications over a single connection, marking them sent.  If the server
+    rejects a message, only its own notification fails, and it's marked so that later batches don't retry it.
+    Returns False if we couldn't connect or lost the connection, leaving the notifications we didn't get to unsent."""
+    if not notifications:
+        return True
+    sent, failed, connected = [], [], True
+    try:
+        with get_connection(fail_silently=False) as connection:
+            for notification in notifications:
+                try:
+                    get_notification_email(notification, connection).send()
+                except MESSAGE_SEND_ERRORS:
+                    logger.exception(f"Couldn't email notification {notification.pk} to {notification.user.email}")
+                    failed.append(notification)
+                else:
+                    sent.append(notification)
+    except (smtplib.SMTPException, OSError):
+        logger.exception("Lost the connection to the email server")
+        connected = False
+    Notification.objects.filter(pk__in=[n.pk for n in sent]).update(sent=True)
+    Notification.objects.filter(pk__in=[n.pk for n in failed]).update(send_failed=True)
+    for notification in sent:
+        notification.sent = True
+    for notification in failed:
+        notification.send_failed = True
+    return connected
+
+
+def queue_immediate_emails():
+    """Queues delivery of unsent immediate notifications.  Tests deliver synchronously, since there's no cluster."""
+    from mysite.settings import TESTING
+    async_task('accounts.tasks.send_immediate_notifications', sync=TESTING)
 
 
 @receiver(post_save, sender=Notification)
 def trigger_immediate_email(sender, instance, created, **kwargs):
     if not instance.sent and instance.email_type == "now":
-        send_notification_email(instance)
+        queue_immediate_emails()
@@ -1,51 +1,86 @@
-import time
-
 from django.contrib.auth.models import User
+from django.db import transaction
 
+from concord.actions.models import Action
 from concord.utils.helpers import Client
-from .models import Notification
 
+from groups.memberships import get_role_holders, membership_memo
+from groups.permissions import get_eligible_actors_for_action
+from .models import Notification, send_notification_emails, queue_immediate_emails
+
+
+def get_members_to_notify(action):
+    """Gets members of the community that owns the action's target, along with their notification settings, in a
+    single query.  Excludes the actor, since we don't notify users about actions they took, and members who have
+    already been notified about the action."""
+    member_pks = get_role_holders(action.target.get_owner(), "members")  # get members of community owner of target
+    already_notified = Notification.objects.filter(action=action).values("user_id")
+    return User.objects.filter(pk__in=member_pks).exclude(pk=action.actor.pk).exclude(pk__in=already_notified)\
+        .select_related("notify_settings")
 
-def user_approval_match(user, action):
-    """Checks if the given action has triggered a decision-making condition and, if so, checks whether the
-    given user is eligible to participate in that decision."""
 
-    time.sleep(5)  # give action time to go through pipeline & create conditions
+def lock_action(action):
+    """Locks the action's row until the end of the transaction.  The tasks generating notifications for an action
+    may run at the same time, so each takes the lock before checking who has already been notified."""
+    list(Action.objects.select_for_update().filter(pk=action.pk).values_list("pk", flat=True))
 
-    for condition in Client().Conditional.get_condition_items_for_action(action_pk=action.pk):
-        permissions = Client().PermissionResource.get_permissions_on_object(target_object=condition)
-        for permission in permissions:
-            match = Client().PermissionResource.actor_satisfies_permission(actor=user, permission=permission)
-            if match:
-                return True
 
-    return False
+def create_notifications(notifications):
+    """Saves notifications in bulk.  Since bulk_create doesn't send post_save signals, we queue delivery of the
+    immediate emails ourselves."""
+    notifications = Notification.objects.bulk_create(notifications)
+    if any(n.email_type == "now" for n in notifications):
+        queue_immediate_emails()
+    return notifications
 
 
 def generate_notifications(action):
+    """Called when an action is created, notifies members who get notified about everything or who created the
+    target.  The action's conditions don't exist yet, so approval notifications are generated separately."""
+
+    creator = action.target.creator
+    notifications = []
+
+    with transaction.atomic():
+
+        lock_action(action)
+
+        for user in get_members_to_notify(action):
+
+            if user.notify_settings.always_notify_everything:
+                note = "everything"
+            elif user.notify_settings.always_notify_creator and creator == user:
+                note = "creator"
+            else:
+                continue
+
+            notifications.append(Notification(
+                user=user, action=action, sent=False, notes=note, email_type=user.notify_settings.send_emails))
 
-    for member_pk in action.target.get_owner().roles.get_members():  # get members of community owner of target
+        return create_notifications(notifications)
 
-        user = User.objects.get(pk=member_pk)
 
-        if action.actor == user:
-            continue  # no notifications when user took the action
+def generate_approval_notifications(action):
+    """Called once an action is waiting on conditions, which means the conditions have been created, notifies
+    members who may be eligible to approve the action and who haven't already been notified about it."""
 
-        if user.notify_settings.always_notify_everything:
-            note = "everything"
-        elif user.notify_settings.always_notify_creator and action.target.creator == user:
-            note = "creator"
-        elif user.notify_settings.always_notify_approval and user_approval_match(user, action):
-            note = "approval"
-        else:
-            note = None
+    with membership_memo():   # the conditions' permissions often share roles, which we only need to expand once
+        eligible_actors = get_eligible_actors_for_action(action)
+    if not eligible_actors:
+        return []
 
-        if note:
-            notification = Notification(
-                user=user, action=action, sent=False, notes=note, email_type=user.notify_settings.send_emails)
-            notification.save()
-        else:
-            print("No matches, sorry")
+    with transaction.atomic():
+
+        lock_action(action)
+        members = get_members_to_notify(action).filter(notify_settings__always_notify_approval=True)
+
+        notifications = [
+            Notification(user=user, action=action, sent=False, notes="approval",
+                         email_type=user.notify_settings.send_emails)
+            for user in members if user.pk in eligible_actors
+        ]
+
+        return create_notifications(notifications)
 
 
 def create_resolved_notification(action):
@@ -59,3 +94,22 @@ def create_resolved_notification(action):
                 notification = Notification(user=action.actor, action=action, sent=False, notes="resolved",
                                             email_type=action.actor.notify_settings.send_emails)
                 notification.save()
+
+
+EMAIL_BATCH_SIZE = 100
+
+
+def send_immediate_notifications(batch_size=EMAIL_BATCH_SIZE):
+    """Delivers unsent immediate notifications in batches, with one connection per batch.  Each batch is locked
+    while it's sent, so overlapping tasks skip it rather than sending the same emails twice.  Notifications whose
+    emails were rejected are marked as failed, so they don't hold up the notifications after them."""
+
+    while True:
+        with transaction.atomic():
+            batch = list(Notification.objects.select_for_update(skip_locked=True, of=("self",))
+                         .filter(email_type="now", sent=False, send_failed=False).select_related("user", "action")
+                         .order_by("pk")[:batch_size])
+            if not batch:
+                return
+            if not send_notification_emails(batch):
+                return   # the rest will be sent by the next task, once we can reach the email server again
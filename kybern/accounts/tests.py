@@ -0,0 +1,165 @@
+import smtplib, time
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.test import TestCase
+
+from concord.utils.helpers import Changes, Client
+
+from groups.permissions import get_eligible_actors_for_action
+from accounts.models import Notification, NotificationsSettings
+from accounts.tasks import generate_notifications, generate_approval_notifications, send_immediate_notifications
+
+
+class NotificationsTestCase(TestCase):
+
+    def setUp(self):
+
+        # create group, add members, add role with three members
+        for user_name in ["meganrapinoe", "christenpress", "tobinheath", "crystaldunn", "julieertz"]:
+            User.objects.create_user(user_name, 'shaunagm@gmail.com', 'badlands2020')
+        NotificationsSettings.objects.update(always_notify_creator=False)
+        self.pinoe = User.objects.get(username="meganrapinoe")
+        self.press = User.objects.get(username="christenpress")
+        self.heath = User.objects.get(username="tobinheath")
+        self.client = Client(actor=self.pinoe)
+        self.community = self.client.Community.create_community(name="USWNT")
+        self.client.update_target_on_all(target=self.community)
+        self.client.Community.add_members_to_community(member_pk_list=[user.pk for user in User.objects.all()])
+        self.client.Community.add_role_to_community(role_name="forwards")
+        self.client.Community.add_people_to_role(
+            role_name="forwards", people_to_add=[self.pinoe.pk, self.press.pk, self.heath.pk])
+
+        # add permission with approval condition that forwards can approve
+        action, self.permission = self.client.PermissionResource.add_permission(
+            change_type=Changes().Communities.AddRole, roles=["forwards"])
+        perm_data = [
+            {"permission_type": Changes().Conditionals.Approve, "permission_roles": ["forwards"]},
+            {"permission_type": Changes().Conditionals.Reject, "permission_roles": ["forwards"]}
+        ]
+        self.client.Conditional.set_target(self.permission)
+        self.client.Conditional.add_condition(condition_type="approvalcondition", permission_data=perm_data)
+
+        # heath takes action that triggers condition
+        self.client.Community.set_actor(self.heath)
+        self.action, result = self.client.Community.add_role_to_community(role_name="midfielders")
+
+    def notified_users(self, notes=None):
+        notifications = Notification.objects.filter(action=self.action)
+        if notes:
+            notifications = notifications.filter(notes=notes)
+        return set(notifications.values_list("user__username", flat=True))
+
+    def test_approval_notifications_go_to_eligible_members(self):
+        generate_notifications(self.action)
+        self.assertEquals(self.notified_users(), set())
+        generate_approval_notifications(self.action)
+        self.assertEquals(self.notified_users(), {"meganrapinoe", "christenpress"})
+
+    def test_approval_notifications_skip_members_already_notified(self):
+        self.press.notify_settings.always_notify_everything = True
+        self.press.notify_settings.save()
+        generate_notifications(self.action)
+        generate_approval_notifications(self.action)
+        generate_approval_notifications(self.action)
+        self.assertEquals(self.notified_users("everything"), {"christenpress"})
+        self.assertEquals(self.notified_users("approval"), {"meganrapinoe"})
+
+    def test_notifications_skip_members_already_notified_about_approval(self):
+        self.press.notify_settings.always_notify_everything = True
+        self.press.notify_settings.save()
+        generate_approval_notifications(self.action)
+        generate_notifications(self.action)
+        self.assertEquals(self.notified_users("approval"), {"meganrapinoe", "christenpress"})
+        self.assertEquals(self.notified_users("everything"), set())
+
+    def test_saving_waiting_action_queues_approval_notifications(self):
+        self.assertEquals(self.action.status, "waiting")
+        with patch("mysite.settings.TESTING", False), patch("accounts.models.async_task") as mock_async_task:
+            self.action.save()
+        mock_async_task.assert_any_call('accounts.tasks.generate_approval_notifications', self.action)
+
+    def test_bulk_notifications_send_immediate_emails_and_mark_sent(self):
+        NotificationsSettings.objects.update(always_notify_everything=True, send_emails="now")
+        NotificationsSettings.objects.filter(user=self.press).update(send_emails="day")
+        mail.outbox = []
+        generate_notifications(self.action)
+        self.assertEquals(self.notified_users(), {"meganrapinoe", "christenpress", "crystaldunn", "julieertz"})
+        self.assertEquals(len(mail.outbox), 3)
+        self.assertEquals(set(Notification.objects.filter(action=self.action, sent=True).values_list(
+            "user__username", flat=True)), {"meganrapinoe", "crystaldunn", "julieertz"})
+
+    def test_eligible_actors_match_permission_checks(self):
+        eligible_actors = get_eligible_actors_for_action(self.action)
+        permissions = [permission for condition in Client().Conditional.get_condition_items_for_action(
+            action_pk=self.action.pk) for permission in Client().PermissionResource.get_permissions_on_object(
+            target_object=condition)]
+        for user in User.objects.all():
+            satisfies_permission = any(Client().PermissionResource.actor_satisfies_permission(
+                actor=user, permission=permission) for permission in permissions)
+            self.assertEquals(user.pk in eligible_actors, satisfies_permission)
+
+    def test_immediate_emails_are_sent_in_batches_over_one_connection_each(self):
+        Notification.objects.bulk_create([
+            Notification(user=self.press, action=self.action, notes="everything", email_type="now")
+            for i in range(250)])
+        mail.outbox = []
+        with patch("accounts.models.get_connection", wraps=get_connection) as mock_get_connection:
+            start = time.perf_counter()
+            send_immediate_notifications(batch_size=100)
+            elapsed = time.perf_counter() - start
+        self.assertEquals(mock_get_connection.call_count, 3)
+        self.assertEquals(len(mail.outbox), 250)
+        self.assertFalse(Notification.objects.filter(sent=False, email_type="now").exists())
+        self.assertLess(elapsed / 250, 0.05)  # well under 50ms per email, without a connection each
+
+    def test_rejected_email_only_fails_its_own_notification(self):
+        self.heath.email = "rejected@example.com"
+        self.heath.save()
+        Notification.objects.bulk_create([
+            Notification(user=user, action=self.action, notes="everything", email_type="now")
+            for user in [self.heath, self.pinoe, self.press]])
+        mail.outbox = []
+        send = EmailMultiAlternatives.send
+
+        def send_unless_rejected(email, *args, **kwargs):
+            if email.to == ["rejected@example.com"]:
+                raise smtplib.SMTPRecipientsRefused({"rejected@example.com": (550, b"No such user")})
+            return send(email, *args, **kwargs)
+
+        with patch.object(EmailMultiAlternatives, "send", send_unless_rejected):
+            send_immediate_notifications(batch_size=2)
+        self.assertEquals(len(mail.outbox), 2)
+        self.assertEquals(list(Notification.objects.filter(send_failed=True).values_list("user", flat=True)),
+                          [self.heath.pk])
+        self.assertFalse(Notification.objects.filter(sent=False, send_failed=False, email_type="now").exists())
+
+    def test_daily_digest_resumes_after_interruption(self):
+        Notification.objects.bulk_create(
+            [Notification(user=user, action=self.action, notes="everything", email_type="day")
+             for user in [self.pinoe, self.press] for i in range(3)])
+        mail.outbox = []
+
+        def render_then_fail(template_name, context):
+            if len(mail.outbox) == 1:
+                raise ConnectionError("interrupted")
+            return render_to_string(template_name, context)
+
+        with patch("accounts.management.commands.daily_notifications.render_to_string", side_effect=render_then_fail):
+            with self.assertRaises(ConnectionError):
+                call_command("daily_notifications")
+        self.assertEquals(len(mail.outbox), 1)
+        self.assertEquals(Notification.objects.filter(email_type="day", sent=False).count(), 3)
+
+        call_command("daily_notifications")
+        self.assertEquals(len(mail.outbox), 2)
+        self.assertIn("Hi meganrapinoe", mail.outbox[0].body)
+        self.assertIn("Hi christenpress", mail.outbox[1].body)
+        self.assertFalse(Notification.objects.filter(email_type="day", sent=False).exists())
+
+        call_command("daily_notifications")
+        self.assertEquals(len(mail.outbox), 2)
@@ -10,7 +10,7 @@ from concord.utils.helpers import Client
 from concord.actions.models import TemplateModel
 
 from groups.models import Group
-from groups.views import serialize_template_for_vue, process_action, get_urls
+from groups.views import serialize_template_for_vue, process_actions, get_urls
 
 from accounts.models import Profile, NotificationsSettings, Notification
 from accounts.forms import RegistrationFormCleanEmail
@@ -36,11 +36,13 @@ def serialize_group(group):
 
 
 def get_serialized_notifications(user):
+    user_notifications = list(Notification.objects.filter(user=user).select_related("action"))
+    action_data = process_actions([n.action for n in user_notifications])
     notifications = []
-    for n in Notification.objects.filter(user=user):
+    for n, action in zip(user_notifications, action_data):
         group = n.action.target.get_owner()
         notifications.append({
-            "created": str(n.created), "sent": n.sent, "notes": n.notes, "action": process_action(n.action),
+            "created": str(n.created), "sent": n.sent, "notes": n.notes, "action": action,
             "group_name": group.name, "group_pk": group.pk
         })
     return notifications
@@ -5,7 +5,8 @@ import axios from '../store/axios_instance'
 const ActionsVuexModule = {
 
     state: {
-        actions: {}                // { 'group_1' : [ { action_dict }, { action_dict } ] }
+        actions: {},               // { 'group_1' : [ { action_dict }, { action_dict } ] }
+        action_cursors: {}         // { 'group_1' : { next: cursor, latest: cursor } }
     },
     getters: {
         getActionData: (state, getters) => (action_pk) => {
@@ -19,6 +20,17 @@ const ActionsVuexModule = {
         REPLACE_ACTIONS_FOR_ITEM (state, data) {
                 Vue.set(state.actions, data.item_key.toLowerCase(), data.action_data)
             },
+        UPDATE_ACTION_CURSORS (state, data) {
+            // Cursors are only replaced when provided, so paging backwards doesn't lose the latest cursor
+
+            var item_key = data.item_key.toLowerCase()
+            var cursors = state.action_cursors[item_key] ? state.action_cursors[item_key] : {}
+
+            Vue.set(state.action_cursors, item_key, {
+                next: data.next !== undefined ? data.next : cursors.next,
+                latest: data.latest ? data.latest : cursors.latest
+            })
+        },
         ADD_OR_UPDATE_ACTION (state, data) {
             // Takes in action data and the item_key for the item the action targets
 
@@ -55,12 +67,59 @@ const ActionsVuexModule = {
 
         },
         async loadActions({ state, commit, rootState, dispatch, getters }, payload) {
+            // Loads the first page of actions for an item, or, if we've loaded them before, only the actions
+            // taken since then
+
+            var item_key = payload.item_id + "_" + payload.item_model
+            var cursors = state.action_cursors[item_key.toLowerCase()]
+            if (cursors && cursors.latest) { return dispatch('loadNewActions', payload) }
+
             var url = await getters.url_lookup('get_action_data_for_target')
             var item_model = payload.item_model == "list" ? "simplelist" : payload.item_model
             var params = { item_id: payload.item_id, item_model: item_model }
             var implementationCallback = (response) => {
-                var item_key = payload.item_id + "_" + payload.item_model
                 commit('REPLACE_ACTIONS_FOR_ITEM', { action_data : response.data.action_data, item_key : item_key })
+                commit('UPDATE_ACTION_CURSORS', { item_key: item_key, next: response.data.next_cursor,
+                    latest: response.data.latest_cursor })
+            }
+            return dispatch('getAPIcall', { url: url, params: params, implementationCallback: implementationCallback})
+
+        },
+        async loadNewActions({ state, commit, rootState, dispatch, getters }, payload) {
+            // Fetches actions taken since the latest one we've loaded, page by page until we're caught up
+
+            var item_key = payload.item_id + "_" + payload.item_model
+            var url = await getters.url_lookup('get_action_data_for_target')
+            var item_model = payload.item_model == "list" ? "simplelist" : payload.item_model
+            var params = { item_id: payload.item_id, item_model: item_model,
+                since: state.action_cursors[item_key.toLowerCase()].latest }
+            var more_to_load = false
+            var implementationCallback = (response) => {
+                for (let index in response.data.action_data) {
+                    commit('ADD_OR_UPDATE_ACTION', { action_data : response.data.action_data[index], item_key : item_key })
+                }
+                commit('UPDATE_ACTION_CURSORS', { item_key: item_key, latest: response.data.latest_cursor })
+                more_to_load = response.data.next_cursor ? true : false
+            }
+            await dispatch('getAPIcall', { url: url, params: params, implementationCallback: implementationCallback})
+            if (more_to_load) { return dispatch('loadNewActions', payload) }
+
+        },
+        async loadOlderActions({ state, commit, rootState, dispatch, getters }, payload) {
+            // Fetches the next page of older actions, if there is one
+
+            var item_key = payload.item_id + "_" + payload.item_model
+            var cursors = state.action_cursors[item_key.toLowerCase()]
+            if (!cursors || !cursors.next) { return }
+
+            var url = await getters.url_lookup('get_action_data_for_target')
+            var item_model = payload.item_model == "list" ? "simplelist" : payload.item_model
+            var params = { item_id: payload.item_id, item_model: item_model, before: cursors.next }
+            var implementationCallback = (response) => {
+                for (let index in response.data.action_data) {
+                    commit('ADD_OR_UPDATE_ACTION', { action_data : response.data.action_data[index], item_key : item_key })
+                }
+                commit('UPDATE_ACTION_CURSORS', { item_key: item_key, next: response.data.next_cursor })
             }
             return dispatch('getAPIcall', { url: url, params: params, implementationCallback: implementationCallback})
 
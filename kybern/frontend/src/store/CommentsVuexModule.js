@@ -1,12 +1,16 @@
 import Vue from 'vue'
 
 
+// Comment requests made while rendering, e.g. by every post on a page, are queued and sent together
+var queued_comment_requests = []
+
 const CommentsVuexModule = {
 
     state: {
 
         item_comments: {},          // { item_pk + "_" + item_model: [pk, pk, pk] }
-        comments: {}                // { int(pk) : { text: x, created_at: x, author: pk, etc}}
+        comments: {},               // { int(pk) : { text: x, created_at: x, author: pk, etc}}
+        comment_cursors: {}         // { item_pk + "_" + item_model: cursor for older comments, or null }
 
     },
 
@@ -30,8 +34,16 @@ const CommentsVuexModule = {
             var item_key = data.item_id + "_" + data.item_model
             Vue.set(state.item_comments, item_key, data.pks)
         },
+        PREPEND_ITEM_COMMENTS (state, data) {
+            var item_key = data.item_id + "_" + data.item_model
+            Vue.set(state.item_comments, item_key, data.pks.concat(state.item_comments[item_key] || []))
+        },
+        SET_COMMENT_CURSOR (state, data) {
+            Vue.set(state.comment_cursors, data.item_id + "_" + data.item_model, data.cursor)
+        },
         ADD_COMMENT_TO_ITEM (state, data ) {
             var item_key = data.item_id + "_" + data.item_model
+            if (!state.item_comments[item_key]) { return }  // not loaded yet, we'll get it when we fetch the thread
             var comment_index = state.item_comments[item_key].indexOf(data.comment_pk)
             if (comment_index == -1) { state.item_comments[item_key].push(parseInt(data.comment_pk)) }
         },
@@ -44,6 +56,10 @@ const CommentsVuexModule = {
             Vue.set(state.comments, data.pk, data.data)
         },
         DELETE_COMMENT (state, data) {
+            for (let item_key in state.item_comments) {
+                var comment_index = state.item_comments[item_key].indexOf(parseInt(data.pk))
+                if (comment_index > -1) { state.item_comments[item_key].splice(comment_index, 1) }
+            }
             Vue.delete(state.comments, data.pk);
         }
 
@@ -51,15 +67,49 @@ const CommentsVuexModule = {
 
     actions: {
 
-        async getComments({ commit, state, dispatch, getters }, payload) {
-            var url = await getters.url_lookup('get_comment_data')
-            var params = { item_id: payload.item_id, item_model: payload.item_model }
+        getComments({ commit, state, dispatch, getters }, payload) {
+            // Queues the item so that all items requesting comments in the same tick are fetched in one request
+            return new Promise((resolve, reject) => {
+                queued_comment_requests.push({ item_id: payload.item_id, item_model: payload.item_model,
+                    resolve: resolve, reject: reject })
+                if (queued_comment_requests.length == 1) { setTimeout(() => dispatch('getQueuedComments'), 0) }
+            })
+        },
+        async getQueuedComments({ commit, state, dispatch, getters }, payload) {
+            var requests = queued_comment_requests
+            queued_comment_requests = []
+            var url = await getters.url_lookup('get_comment_threads')
+            var params = { targets: requests.map(request => {
+                return { item_id: request.item_id, item_model: request.item_model } }) }
+            var implementationCallback = (response) => {
+                for (let comment_pk in response.data.comments) {
+                    commit('ADD_OR_UPDATE_COMMENT', { pk: comment_pk, data: response.data.comments[comment_pk] })
+                }
+                for (let thread of response.data.threads) {
+                    commit('REPLACE_ITEM_COMMENTS', { item_id: thread.item_id, item_model: thread.item_model,
+                        pks: thread.comment_pks })
+                    commit('SET_COMMENT_CURSOR', { item_id: thread.item_id, item_model: thread.item_model,
+                        cursor: thread.next_cursor })
+                }
+            }
+            return dispatch('getAPIcall', { url: url, params: params, implementationCallback: implementationCallback})
+            .then(response => { requests.forEach(request => request.resolve(response)) })
+            .catch(error => { requests.forEach(request => request.reject(error)) })
+        },
+        async getOlderComments({ commit, state, dispatch, getters }, payload) {
+            var cursor = state.comment_cursors[payload.item_id + "_" + payload.item_model]
+            if (!cursor) { return }
+            var url = await getters.url_lookup('get_comment_threads')
+            var params = { targets: [{ item_id: payload.item_id, item_model: payload.item_model }], before: cursor }
             var implementationCallback = (response) => {
                 for (let comment_pk in response.data.comments) {
                     commit('ADD_OR_UPDATE_COMMENT', { pk: comment_pk, data: response.data.comments[comment_pk] })
                 }
-                commit('REPLACE_ITEM_COMMENTS', { item_id: response.data.item_id, item_model: response.data.item_model,
-                    pks: response.data.comment_pks })
+                var thread = response.data.threads[0]
+                commit('PREPEND_ITEM_COMMENTS', { item_id: thread.item_id, item_model: thread.item_model,
+                    pks: thread.comment_pks })
+                commit('SET_COMMENT_CURSOR', { item_id: thread.item_id, item_model: thread.item_model,
+                    cursor: thread.next_cursor })
             }
             return dispatch('getAPIcall', { url: url, params: params, implementationCallback: implementationCallback})
         },
@@ -0,0 +1,58 @@
+import Vue from 'vue'
+
+
+const MAX_POLLS = 150   // five minutes
+
+const ExportsVuexModule = {
+    state: {
+        export_jobs: {}                 // { pk: { pk: pk, item_id: item_id, item_model: item_model, status: status, download_url: url, etc } }
+    },
+    getters: {
+        getExportJobForItem: (state, getters) => (item_id, item_model) => {
+            var jobs = Object.values(state.export_jobs).filter(
+                job => job.item_id == item_id && job.item_model == item_model)
+            return jobs.length ? jobs[jobs.length - 1] : undefined
+        }
+    },
+    mutations: {
+        ADD_OR_UPDATE_EXPORT_JOB (state, data) {
+            Vue.set(state.export_jobs, data.export_job.pk, data.export_job)
+        }
+    },
+    actions: {
+        async startExportJob({ commit, state, dispatch, getters }, payload) {
+            // Queues an export to run in the background, then polls until it's ready to download
+            var url = await getters.url_lookup('start_export_job')
+            var params = { item_id: payload.item_id, item_model: payload.item_model,
+                export_format: payload.export_format }
+            var implementationCallback = (response) => {
+                commit('ADD_OR_UPDATE_EXPORT_JOB', { export_job: response.data.export_job })
+            }
+            await dispatch('getAPIcall', { url: url, params: params, implementationCallback: implementationCallback})
+            var job = getters.getExportJobForItem(payload.item_id, payload.item_model)
+            return dispatch('pollExportJob', { job_pk: job.pk })
+        },
+        async pollExportJob({ commit, state, dispatch, getters }, payload) {
+            // Polls every couple of seconds, giving up if the job hasn't finished after MAX_POLLS, for instance
+            // because the task cluster is down
+            var job = state.export_jobs[payload.job_pk]
+            if (job.status == "finished" || job.status == "failed") { return job }
+            var polls = payload.polls ? payload.polls : 0
+            if (polls >= MAX_POLLS) {
+                commit('ADD_OR_UPDATE_EXPORT_JOB', { export_job: Object.assign({}, job, { status: "failed",
+                    error: "The export is taking too long, please try again later." }) })
+                return state.export_jobs[payload.job_pk]
+            }
+            await new Promise(resolve => setTimeout(resolve, 2000))
+            var url = await getters.url_lookup('get_export_job')
+            var params = { job_pk: payload.job_pk }
+            var implementationCallback = (response) => {
+                commit('ADD_OR_UPDATE_EXPORT_JOB', { export_job: response.data.export_job })
+            }
+            await dispatch('getAPIcall', { url: url, params: params, implementationCallback: implementationCallback})
+            return dispatch('pollExportJob', { job_pk: payload.job_pk, polls: polls + 1 })
+        }
+    }
+}
+
+export default ExportsVuexModule
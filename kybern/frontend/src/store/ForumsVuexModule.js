@@ -4,7 +4,8 @@ import Vue from 'vue'
 const ForumsVuexModule = {
     state: {
         forums: [],                     // [ { pk: pk, name: name, description: description }],
-        posts: []                       // [ { pk: pk, forum_pk: forum_pk, title: title, content: content, author: author, etc } ] }
+        posts: [],                      // [ { pk: pk, forum_pk: forum_pk, title: title, content: content, author: author, etc } ] }
+        older_posts_cursors: {}         // { forum_pk: cursor }, null once all of a forum's posts are loaded
     },
     getters: {
         getForumData: (state, getters) => (forum_pk) => {
@@ -54,6 +55,9 @@ const ForumsVuexModule = {
                 }
             }
         },
+        SET_OLDER_POSTS_CURSOR (state, data) {
+            Vue.set(state.older_posts_cursors, data.forum_pk, data.cursor)
+        },
         DELETE_POST (state, data) {
             for (let index in state.posts) {
                 if (state.posts[index].pk == data.pk) {
@@ -113,6 +117,23 @@ const ForumsVuexModule = {
                 for (let index in response.data.posts) {
                     commit('ADD_POST', { post_data: response.data.posts[index] })
                 }
+                if (state.older_posts_cursors[payload.forum_pk] === undefined) {
+                    commit('SET_OLDER_POSTS_CURSOR', { forum_pk: payload.forum_pk, cursor: response.data.next_cursor })
+                }
+            }
+            return dispatch('getAPIcall', { url: url, params: params, implementationCallback: implementationCallback})
+        },
+        async loadOlderPosts({ commit, state, dispatch, getters }, payload) {
+            // Fetches the next page of older posts in the forum, if there is one
+            var cursor = state.older_posts_cursors[payload.forum_pk]
+            if (!cursor) { return }
+            var url = await getters.url_lookup('get_posts_for_forum')
+            var params = { forum_pk: payload.forum_pk, before: cursor }
+            var implementationCallback = (response) => {
+                for (let index in response.data.posts) {
+                    commit('ADD_POST', { post_data: response.data.posts[index] })
+                }
+                commit('SET_OLDER_POSTS_CURSOR', { forum_pk: payload.forum_pk, cursor: response.data.next_cursor })
             }
             return dispatch('getAPIcall', { url: url, params: params, implementationCallback: implementationCallback})
         },
@@ -1,4 +1,5 @@
 import Vue from 'vue'
+import axios from '../store/axios_instance'
 
 
 const GovernanceVuexModule = {
@@ -8,7 +9,7 @@ const GovernanceVuexModule = {
         // Roles & members
         members: [],    // [ pk, pk, pk, pk ]
         roles: [],              // [ { name: role_name, current_members: [pk, pk, pk] } ]
-        users: [],              // [ { name: 'username', pk: pk } ]
+        users: [],              // [ { name: 'username', pk: pk } ], group members plus any users looked up
         current_membership_option: "",         // ie "invite only", "anyone can join"
         membership_config_data: { "permission": null, "condition": null },         // { permission: null, condition: null }
 
@@ -106,9 +107,6 @@ const GovernanceVuexModule = {
             if (role_name == 'members') {  return getters.groupMembersAsOptions  }
             else {  return getters.roleMembersAsOptions(role_name)  }
         },
-        nonmembersAsOptions: (state, getters) => {
-            return state.users.filter(user => state.members.indexOf(user.pk) == -1 )
-        },
         leadershipAsOptions: (state, getters) => {
             return {
                 owner_role_options: state.owners.roles.map(role => { return {name: role } }),
@@ -126,6 +124,11 @@ const GovernanceVuexModule = {
         SET_USERS (state, data) {
             Vue.set(state, 'users', data.users);
         },
+        ADD_USERS (state, data) {
+            data.users.forEach(function(user) {
+                if (!state.users.find(existing_user => existing_user.pk == user.pk)) { state.users.push(user) }
+            })
+        },
         SET_ROLES (state, data) {
             Vue.set(state, 'roles', data.roles);
         },
@@ -236,15 +239,28 @@ const GovernanceVuexModule = {
         initialize_members_with_current_user ({ commit, state, dispatch, getters}, payload) {
             commit('SET_CURRENT_USER_AS_ONLY_GROUP_MEMBER', {users: [payload.user], user_pk: payload.user.pk})
         },
+        setGovernanceData ({ commit, state, dispatch, getters}, payload) {
+            commit('SET_USERS', { users: payload.governance_data.users })
+            commit('SET_ROLES', { roles: payload.governance_data.roles })
+            commit('SET_LEADERS', { owners: payload.governance_data.owners,
+                                    governors: payload.governance_data.governors })
+            commit('ADD_MEMBERS', { user_pks: payload.governance_data.current_members })
+            commit('SET_GOVERNANCE_INFO', { governance_info: payload.governance_data.governance_info })
+        },
+        async searchUsers ({ commit, state, dispatch, getters}, payload) {
+            // Looks up users by username prefix, adding them to state.users so their names can be displayed
+            var url = await getters.url_lookup('search_users')
+            var params = { query: payload.query, after: payload.after }
+            var implementationCallback = (response) => {
+                commit('ADD_USERS', { users: response.data.users })
+            }
+            return axios.post(url, params).then(response => { implementationCallback(response); return response.data })
+            .catch(error => { console.log(error); throw error })
+        },
         async getGovernanceData ({ commit, state, dispatch, getters}, payload) {
             var url = await getters.url_lookup('get_governance_data')
             var implementationCallback = (response) => {
-                commit('SET_USERS', { users: response.data.governance_data.users })
-                commit('SET_ROLES', { roles: response.data.governance_data.roles })
-                commit('SET_LEADERS', { owners: response.data.governance_data.owners,
-                                        governors: response.data.governance_data.governors })
-                commit('ADD_MEMBERS', { user_pks: response.data.governance_data.current_members })
-                commit('SET_GOVERNANCE_INFO', { governance_info: response.data.governance_data.governance_info })
+                dispatch('setGovernanceData', { governance_data: response.data.governance_data })
             }
             return dispatch('getAPIcall', { url: url, implementationCallback: implementationCallback})
         },
@@ -226,17 +226,20 @@ const PermissionsVuexModule = {
 
         // initialize data
 
+        setPermissionData ({ commit, state, dispatch, getters}, payload) {
+            commit('SET_PERMISSION_OPTIONS', { options: payload.permission_data.permission_options })
+            commit('SET_CONDITION_OPTIONS', { options: payload.permission_data.condition_options })
+            commit('SET_CONDITION_CONFIGURATION_OPTIONS', { options: payload.permission_data.condition_configuration_options })
+            commit('SET_DEPENDENT_FIELD_OPTIONS', { options: payload.permission_data.dependent_field_options })
+            commit('SET_LEADERSHIP_CONDITION', { 'leadership_type': "owner",
+                    condition_data: payload.permission_data.owner_condition })
+            commit('SET_LEADERSHIP_CONDITION', { 'leadership_type': "governor",
+                    condition_data: payload.permission_data.governor_condition })
+        },
         async getPermissionData ({ commit, state, dispatch, getters}, payload) {
             var url = await getters.url_lookup('get_permission_data')
             var implementationCallback = (response) => {
-                commit('SET_PERMISSION_OPTIONS', { options: response.data.permission_options })
-                commit('SET_CONDITION_OPTIONS', { options: response.data.condition_options })
-                commit('SET_CONDITION_CONFIGURATION_OPTIONS', { options: response.data.condition_configuration_options })
-                commit('SET_DEPENDENT_FIELD_OPTIONS', { options: response.data.dependent_field_options })
-                commit('SET_LEADERSHIP_CONDITION', { 'leadership_type': "owner",
-                        condition_data: response.data.owner_condition })
-                commit('SET_LEADERSHIP_CONDITION', { 'leadership_type': "governor",
-                        condition_data: response.data.governor_condition })
+                dispatch('setPermissionData', { permission_data: response.data })
             }
             return dispatch('getAPIcall', { url: url, implementationCallback: implementationCallback})
         },
@@ -6,6 +6,7 @@ import axios from '../store/axios_instance'
 import ActionsVuexModule from './ActionsVuexModule'
 import CommentsVuexModule from './CommentsVuexModule'
 import DocumentVuexModule from './DocumentVuexModule'
+import ExportsVuexModule from './ExportsVuexModule'
 import ForumsVuexModule from './ForumsVuexModule'
 import GovernanceVuexModule from './GovernanceVuexModule'
 import PermissionsVuexModule from './PermissionsVuexModule'
@@ -15,6 +16,10 @@ import TemplatesVuexModule from './TemplatesVuexModule'
 
 Vue.use(Vuex)
 
+
+// Set once the page has requested its bootstrap data, so components can wait for it rather than fetch their own
+var bootstrap_request = null
+
 export default new Vuex.Store({
     modules: {
         concord_actions: ActionsVuexModule,  // use 'concord_actions' so as not to conflict with vuex actions
@@ -24,7 +29,8 @@ export default new Vuex.Store({
         governance: GovernanceVuexModule,
         comments: CommentsVuexModule,
         templates: TemplatesVuexModule,
-        simplelists: SimplelistVuexModule
+        simplelists: SimplelistVuexModule,
+        exports: ExportsVuexModule
     },
     state: {
         group_pk: null,
@@ -33,6 +39,7 @@ export default new Vuex.Store({
         user_pk: null,
         user_name: "",
         urls: {},
+        change_sequence: 0
     },
     getters: {
         getGroupData: (state, getters) => (group_pk) => {
@@ -57,7 +64,8 @@ export default new Vuex.Store({
         UPDATE_GROUP_DESCRIPTION (state, data) { state.group_description = data.group_description },
         SET_URL_MAP(state, data) { state.urls = data.urls },
         UPDATE_USER_PK (state, data) { state.user_pk = data.user_pk },
-        UPDATE_USER_NAME (state, data) { state.user_name = data.user_name }
+        UPDATE_USER_NAME (state, data) { state.user_name = data.user_name },
+        SET_CHANGE_SEQUENCE (state, data) { state.change_sequence = data.change_sequence }
     },
     actions: {
 
@@ -76,6 +84,96 @@ export default new Vuex.Store({
             commit('UPDATE_USER_NAME', { user_name: payload.user_name })
         },
 
+        async loadBootstrapData({ commit, getters, state, dispatch }, payload) {
+            // Loads everything the group detail page needs in a single request
+            var url = await getters.url_lookup('get_bootstrap_data')
+            var params = { permissions: payload && payload.permissions ? payload.permissions : {} }
+            var implementationCallback = (response) => {
+                dispatch('setGovernanceData', { governance_data: response.data.governance_data })
+                dispatch('setPermissionData', { permission_data: response.data.permission_data })
+                commit('SET_FORUMS', { forums: response.data.forums })
+                for (let index in response.data.lists) {
+                    commit('ADD_OR_UPDATE_LIST', { list_data: response.data.lists[index] })
+                }
+                for (let index in response.data.documents) {
+                    commit('ADD_OR_UPDATE_DOCUMENT', { document_data: response.data.documents[index] })
+                }
+                commit('ADD_OR_UPDATE_CURRENT_USER_PERMISSIONS', { user_permissions: response.data.user_permissions })
+                commit('SET_CHANGE_SEQUENCE', { change_sequence: response.data.latest_sequence })
+            }
+            bootstrap_request = dispatch('getAPIcall', { url: url, params: params,
+                implementationCallback: implementationCallback}).then(() => params.permissions)
+            return bootstrap_request
+        },
+
+        waitForBootstrap({ commit, state, dispatch }, payload) {
+            // Resolves once bootstrap data has loaded, to the permissions it checked, or to null if the page isn't
+            // bootstrapping or bootstrapping failed, in which case components should fetch their own data
+            if (!bootstrap_request) { return Promise.resolve(null) }
+            return bootstrap_request.catch(error => null)
+        },
+
+        applyChange({ commit, state, dispatch }, change) {
+            // Applies a single change from the change feed, using the same mutations as the actions which make them
+            var item = change.item
+            var deleted = change.change == "deleted"
+            if (change.item_model == "group") {
+                commit('UPDATE_GROUP_NAME', { group_name : item.name })
+                commit('UPDATE_GROUP_DESCRIPTION', { group_description : item.description })
+                dispatch('getGovernanceData')
+            } else if (change.item_model == "forum") {
+                if (deleted) { commit('DELETE_FORUM', { pk: change.item_id }) }
+                else { commit('ADD_OR_UPDATE_FORUM', { forum_data: item }) }
+            } else if (change.item_model == "post") {
+                if (deleted) { commit('DELETE_POST', { pk: change.item_id }) }
+                else { commit('ADD_POST', { post_data: item }); commit('EDIT_POST', { post_data: item }) }
+            } else if (change.item_model == "simplelist") {
+                if (deleted) { commit('DELETE_LIST', { deleted_list_pk: change.item_id }) }
+                else { commit('ADD_OR_UPDATE_LIST', { list_data: item }) }
+            } else if (change.item_model == "document") {
+                if (deleted) { commit('DELETE_DOCUMENT', { deleted_document_pk: change.item_id }) }
+                else { commit('ADD_OR_UPDATE_DOCUMENT', { document_data: item }) }
+            } else if (change.item_model == "permissionsitem") {
+                if (deleted) { commit('DELETE_PERMISSION', { pk: change.item_id }) }
+                else { commit('ADD_OR_UPDATE_PERMISSION', { pk: change.item_id, data: item }) }
+            } else if (change.item_model == "comment") {
+                if (deleted) { commit('DELETE_COMMENT', { pk: change.item_id }) }
+                else {
+                    commit('ADD_OR_UPDATE_COMMENT', { pk: change.item_id, data: item[change.item_id] })
+                    commit('ADD_COMMENT_TO_ITEM', { comment_pk: change.item_id, item_id: change.commented_item_id,
+                        item_model: change.commented_item_model })
+                }
+            }
+        },
+
+        async syncChanges({ commit, getters, state, dispatch }, payload) {
+            // Fetches the changes made since we last synced and applies them to the store, page by page
+            var url = await getters.url_lookup('get_changes')
+            var has_more = true
+            while (has_more) {
+                var response = await axios.post(url, { since: state.change_sequence })
+                    .catch(error => { console.log(error); throw error })
+                for (let change of response.data.changes) { dispatch('applyChange', change) }
+                commit('SET_CHANGE_SEQUENCE', { change_sequence: response.data.latest_sequence })
+                has_more = response.data.has_more
+            }
+        },
+
+        async listenForGroupEvents({ commit, getters, state, dispatch }, payload) {
+            // Streams the group's activity events, so we hear about actions taken by other members as they happen
+            var url = await getters.url_lookup('group_events')
+            var source = new EventSource(url)
+            var handleEvent = (event) => {
+                var data = JSON.parse(event.data)
+                dispatch('addOrUpdateAction', { action_pk: data.action_pk })
+                if (data.type != "action_created") { dispatch('syncChanges') }
+            }
+            for (let event_type of ["action_created", "action_resolved", "post_added", "vote_cast"]) {
+                source.addEventListener(event_type, handleEvent)
+            }
+            return source
+        },
+
         get_url_data({ commit, state, dispatch }, payload) {
             // possibly delete this since we're getting urls another way
             var url = "/groups/api/get_urls/" + state.group_pk + "/"
@@ -96,6 +194,16 @@ export default new Vuex.Store({
             return dispatch('actionAPIcall', { url: url, params: params, implementationCallback: implementationCallback})
         },
 
+        async takeActions({ commit, getters, state, dispatch }, payload) {
+            // Takes several actions against one target in a single request.  With all_or_nothing, if any action
+            // isn't implemented, none of them are.
+            var url = await getters.url_lookup('take_actions')
+            var params = { actions: payload.actions, all_or_nothing: payload.all_or_nothing,
+                alt_target: payload.alt_target }
+            var implementationCallback = payload.implementationCallback ? payload.implementationCallback : () => {}
+            return dispatch('actionAPIcall', { url: url, params: params, implementationCallback: implementationCallback})
+        },
+
         actionAPIcall({ commit, state, dispatch }, payload) {
 
             var url = payload.url
@@ -104,7 +212,7 @@ export default new Vuex.Store({
 
             return axios.post(url, params).then(response => {
 
-                if (response.data.action_status != "invalid") {
+                if (response.data.action_status != "invalid" && !response.data.rolled_back) {
                     dispatch('updateActions', { response: response })
                 }
                 if (response.data.action_status == "implemented") {
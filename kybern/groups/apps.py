@@ -9,3 +9,5 @@ class GroupsConfig(ConcordAppConfig):
 
     def ready(self):
         from groups import signals
+        from groups.model_registry import get_model_registry
+        get_model_registry()
@@ -0,0 +1,107 @@
+"""
+ASGI endpoint streaming a group's activity events to the browser as server-sent events.
+
+Django's views are synchronous, so a long-lived stream can't be served by a view without tying up a worker thread for
+each connected browser.  Instead mysite.asgi routes requests for the stream here before they reach Django, and the
+stream waits on the group's event subscription in the event loop.  Only members of the group may listen.
+"""
+
+import asyncio, re
+from importlib import import_module
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http import parse_cookie
+
+from .events import format_event, get_broker
+
+
+EVENTS_PATH = re.compile(r"^/groups/api/(?P<group_pk>\d+)/events/$")
+KEEPALIVE_SECONDS = 15
+
+
+def get_group_pk(scope):
+    match = EVENTS_PATH.match(scope["path"]) if scope["type"] == "http" else None
+    return int(match.group("group_pk")) if match else None
+
+
+def user_is_member(scope, group_pk):
+    """Authenticates the request from its session cookie and checks the user is a member of the group."""
+
+    from .memberships import get_memberships
+    from .models import Group
+
+    cookies = {}
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            cookies = parse_cookie(value.decode("latin1"))
+    session_key = cookies.get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return False
+
+    try:
+        session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+        user = get_user(SimpleNamespace(session=session))
+        group = Group.objects.filter(pk=group_pk).first()
+        return bool(user.is_authenticated and group and user.pk in get_memberships(group))
+    finally:
+        close_old_connections()
+
+
+async def send_response(send, status, body=b""):
+    await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def stream_group_events(scope, receive, send, group_pk):
+    """Sends the group's events as they're published, with a comment every KEEPALIVE_SECONDS so that proxies
+    don't close an idle connection, until the browser disconnects."""
+
+    if scope["method"] != "GET":
+        return await send_response(send, 405)
+    if not await sync_to_async(user_is_member)(scope, group_pk):
+        return await send_response(send, 403)
+
+    await send({"type": "http.response.start", "status": 200, "headers": [
+        (b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache"), (b"x-accel-buffering", b"no")]})
+
+    broker = get_broker()
+    subscription = broker.subscribe(group_pk)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        while True:
+            next_event = asyncio.ensure_future(subscription.get())
+            await asyncio.wait({next_event, disconnected}, timeout=KEEPALIVE_SECONDS,
+                               return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_event.cancel()
+                break
+            if next_event.done():
+                body = format_event(next_event.result())
+            else:
+                next_event.cancel()
+                body = b": keepalive\n\n"
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+    finally:
+        broker.unsubscribe(subscription)
+        disconnected.cancel()
+
+
+def route_group_events(django_application):
+    """Wraps the Django ASGI application, serving group event streams and passing everything else to Django."""
+
+    async def application(scope, receive, send):
+        group_pk = get_group_pk(scope)
+        if group_pk is None:
+            return await django_application(scope, receive, send)
+        return await stream_group_events(scope, receive, send, group_pk)
+
+    return application
@@ -0,0 +1,66 @@
+"""
+Benchmarks for code paths that run on every page load.  Run them with `python manage.py run_benchmarks`.
+
+Each benchmark is a function which takes the number of times to run each path and returns a list of (label, seconds
+per run) tuples, so that a slow path can be compared against the path that replaced it.
+"""
+
+import timeit
+from contextlib import suppress
+
+from django.apps import apps
+
+from .model_registry import get_model, get_model_registry
+from .url_map import reverse_urls, get_urls, get_url_templates
+from .views import get_permission_catalog
+
+
+def time_callable(callable_to_time, number, teardown=None):
+    """Returns average seconds per call, excluding the time taken by the optional teardown after each call."""
+    total = 0
+    for _ in range(number):
+        total += timeit.timeit(callable_to_time, number=1)
+        if teardown:
+            teardown()
+    return total / number
+
+
+def benchmark_url_map(number=100):
+    """Compares reversing every route per page load with substituting the target into cached templates."""
+    get_url_templates()   # build templates up front, as the wsgi application does at startup
+    return [
+        ("reverse every route", time_callable(lambda: reverse_urls(target=1), number)),
+        ("format cached templates", time_callable(lambda: get_urls(target=1), number))
+    ]
+
+
+def benchmark_permission_catalog(number=100):
+    """Compares building the permission and condition option catalog per page load with using the cached copy."""
+    get_permission_catalog()
+    return [
+        ("build catalog", time_callable(get_permission_catalog.__wrapped__, number)),
+        ("cached catalog", time_callable(get_permission_catalog, number))
+    ]
+
+
+def get_model_by_scanning_apps(model_name):
+    """Looks up a model the way get_model did before the registry, by asking each app in turn."""
+    for app_config in apps.get_app_configs():
+        with suppress(LookupError):
+            return app_config.get_model(model_name)
+
+
+def benchmark_model_lookup(number=1000):
+    """Compares scanning every app for a model name with looking it up in the registry."""
+    get_model_registry()
+    return [
+        ("scan apps", time_callable(lambda: get_model_by_scanning_apps("post"), number)),
+        ("registry", time_callable(lambda: get_model("post"), number))
+    ]
+
+
+BENCHMARKS = {
+    "url_map": benchmark_url_map,
+    "permission_catalog": benchmark_permission_catalog,
+    "model_lookup": benchmark_model_lookup
+}
@@ -0,0 +1,88 @@
+"""
+Per-group change feed, which lets the frontend keep its store in sync with small deltas instead of full reloads.
+
+We log each item in a group that's created, and each item an implemented action edits or deletes.  Clients remember
+the sequence number of the last entry they've seen and ask for the changes since then.
+"""
+
+from django.db import transaction
+
+from concord.actions.models import PermissionedModel
+from concord.communities.models import BaseCommunityModel
+
+from .model_registry import get_model_registry
+from .models import ChangeLogEntry, ChangeLogSequence
+from .pagination import get_page_size
+
+
+def get_group_for_item(item):
+    """Gets the group an item belongs to, or None for items which don't belong to a group, such as actions."""
+    if isinstance(item, BaseCommunityModel):
+        return item
+    if isinstance(item, PermissionedModel):
+        return item.get_owner()
+
+
+def record_change(item, change, action=None, item_pk=None):
+    """Logs a change to an item to the feed of the group it belongs to.  Only exposed models are logged, since the
+    frontend only keeps those in its store.  Deleted items have lost their pk, so it must be passed in."""
+
+    model_name = item.__class__._meta.model_name
+    if model_name not in get_model_registry():
+        return
+    group = get_group_for_item(item)
+    if not group or not group.pk:
+        return
+
+    with transaction.atomic():
+        sequence = get_next_sequence(group.pk)
+        return ChangeLogEntry.objects.create(group_id=group.pk, sequence=sequence,
+                                             action_id=action.pk if action else None, item_model=model_name,
+                                             item_id=item_pk or item.pk, change=change)
+
+
+def record_action_change(action):
+    """Logs the change an implemented action made to its target, however it came to be implemented: taken directly,
+    retaken, or resolved by a condition.  The target was deleted if it no longer exists, otherwise it was edited.
+    Items an action creates aren't known to the action, so they're logged when they're saved (see signals)."""
+
+    target = action.target
+    if action.status != "implemented" or target is None or not action.object_id:
+        return
+    deleted = not target.__class__._default_manager.filter(pk=action.object_id).exists()
+    return record_change(target, "deleted" if deleted else "edited", action=action, item_pk=int(action.object_id))
+
+
+def get_next_sequence(group_pk):
+    """Takes the next sequence number in the group's feed.  Must be called in a transaction, which holds the lock
+    on the group's counter until the entry is committed."""
+    ChangeLogSequence.objects.get_or_create(group_id=group_pk)
+    counter = ChangeLogSequence.objects.select_for_update().get(group_id=group_pk)
+    counter.last_sequence += 1
+    counter.save(update_fields=["last_sequence"])
+    return counter.last_sequence
+
+
+def get_latest_sequence(group_pk):
+    latest = ChangeLogSequence.objects.filter(group_id=group_pk).values_list("last_sequence", flat=True).first()
+    return latest or 0
+
+
+def get_changes_since(group_pk, since=0, page_size=None):
+    """Gets the changes to the group's items after the given sequence number.  Each item appears once, with its
+    most recent change.  Returns a tuple of the changes, the sequence number to ask for changes since next time,
+    and whether there are more changes to fetch."""
+
+    page_size = get_page_size(page_size)
+    entries = list(ChangeLogEntry.objects.filter(group_id=group_pk, sequence__gt=since or 0)
+                   .order_by("sequence")[:page_size + 1])
+    has_more = len(entries) > page_size
+    entries = entries[:page_size]
+
+    latest_entries = {}
+    for entry in entries:
+        latest_entries.pop((entry.item_model, entry.item_id), None)
+        latest_entries[(entry.item_model, entry.item_id)] = entry
+
+    latest_sequence = entries[-1].sequence if entries else since or 0
+    return list(latest_entries.values()), latest_sequence, has_more
@@ -0,0 +1,137 @@
+"""
+Group activity events, pushed to connected browsers as server-sent events (see groups.asgi).
+
+Events are published from the Action post_save hook once the transaction commits, so rolled back actions are never
+announced.  They're delivered through a broker, which fans each event out to the subscribers listening to the group.
+The default InMemoryBroker only reaches subscribers in the same process, which is what tests and single-process
+deployments need.  Deployments with several processes can point the GROUP_EVENTS_BROKER setting at a broker with the
+same interface which is backed by a shared message bus.
+"""
+
+import asyncio, json, logging, threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from concord.utils.helpers import Changes
+
+from .change_feed import get_group_for_item
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BROKER = "groups.events.InMemoryBroker"
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """A subscriber's queue of events.  Events may be published from any thread, so they're handed to the
+    subscriber's event loop rather than put on the queue directly."""
+
+    def __init__(self, group_pk, loop=None):
+        self.group_pk = group_pk
+        self.loop = loop or asyncio.get_event_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+
+    def put(self, event):
+        self.loop.call_soon_threadsafe(self.put_nowait, event)
+
+    def put_nowait(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()  # a slow subscriber loses its oldest events rather than holding up publishing
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InMemoryBroker:
+    """Delivers events to the subscribers in this process."""
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, group_pk, loop=None):
+        subscription = Subscription(group_pk, loop)
+        with self.lock:
+            self.subscriptions.setdefault(group_pk, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.group_pk, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.group_pk, None)
+
+    def publish(self, group_pk, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(group_pk, []))
+        for subscription in subscriptions:
+            try:
+                subscription.put(event)
+            except RuntimeError:   # the subscriber's event loop has closed without unsubscribing
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, "GROUP_EVENTS_BROKER", DEFAULT_BROKER))()
+
+
+def get_event_type(action, created):
+    """Actions are announced when they're created and when they're resolved.  Adding a post and casting a vote get
+    their own event types, so the frontend can refresh just the forum or condition they happened in."""
+
+    if created:
+        return "action_created"
+    if action.status == "implemented":
+        change_type = action.change.get_change_type()
+        if change_type == Changes().Groups.AddPost:
+            return "post_added"
+        if change_type == Changes().Conditionals.AddVote:
+            return "vote_cast"
+    if action.status in ["implemented", "rejected"]:
+        return "action_resolved"
+
+
+def get_action_event(action, created):
+    """Gets the group pk and event for a saved action, or None if there's nothing to announce."""
+
+    event_type = get_event_type(action, created)
+    group = get_group_for_item(action.target) if event_type and action.target else None
+    if not group:
+        return None
+
+    return group.pk, {"type": event_type, "action_pk": action.pk, "status": action.status,
+                      "target_model": action.target.__class__.__name__.lower(), "target_pk": action.object_id}
+
+
+def publish_action_event(action, created):
+    """Publishes the event for a saved action when the transaction commits.  The event is worked out now, while the
+    action is in the state it was saved in.  Events are a courtesy to listening browsers, so errors are logged rather
+    than failing the action."""
+
+    try:
+        event = get_action_event(action, created)
+    except Exception:
+        logger.exception(f"Couldn't get the event for action {action.pk}")
+        return
+    if event:
+        transaction.on_commit(lambda: publish_event(*event))
+
+
+def publish_event(group_pk, event):
+    try:
+        get_broker().publish(group_pk, event)
+    except Exception:
+        logger.exception(f"Couldn't publish {event['type']} event to group {group_pk}")
+
+
+def format_event(event):
+    """Formats an event for a text/event-stream response."""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
@@ -0,0 +1,62 @@
+"""
+Helpers for streaming exports.
+
+Building a whole export in memory doesn't scale to large forums and lists, so exporters are generators which read
+rows with .iterator(), load related data a chunk at a time, and emit the export in pieces for a StreamingHttpResponse.
+"""
+
+import csv
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+
+from concord.resources.models import Comment
+
+
+EXPORT_CHUNK_SIZE = 500
+
+
+def chunked(iterable, size=EXPORT_CHUNK_SIZE):
+    """Yields lists of up to `size` items from the iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Echo:
+    """A file-like object which returns what is written to it, so csv writers can produce rows for streaming."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(columns, rows):
+    """Yields a CSV header row followed by one line per row dict."""
+    writer = csv.DictWriter(Echo(), fieldnames=columns)
+    yield writer.writerow(dict(zip(columns, columns)))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_export(item, export_format):
+    """Yields the item exported in the given format, either 'csv' (for lists) or 'json' (for forums)."""
+    if export_format == "csv":
+        columns, rows = item.get_csv_data()
+        return iter_csv(columns, rows)
+    return item.iter_json_data()
+
+
+def get_comments_by_target_pk(model_class, pks):
+    """Gets the comments on the given objects in one query, as a dict of object pk to comments, oldest first."""
+
+    content_type = ContentType.objects.get_for_model(model_class)
+    comments = Comment.objects.filter(commented_object_content_type=content_type, commented_object_id__in=pks)\
+        .select_related("commenter").order_by("created_at", "pk")
+
+    comments_by_target_pk = {}
+    for comment in comments:
+        comments_by_target_pk.setdefault(comment.commented_object_id, []).append(comment)
+    return comments_by_target_pk
@@ -0,0 +1,20 @@
+"""Management command which writes a snapshot of a group to a file."""
+
+from django.core.management.base import BaseCommand
+
+from groups.models import Group
+from groups.snapshots import write_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Writes a compressed snapshot of a group and everything it owns, for backups or moving between instances.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('group_pk', type=int)
+        parser.add_argument('path', help='File to write, conventionally ending in .ndjson.gz')
+
+    def handle(self, *args, **options):
+        group = Group.objects.get(pk=options["group_pk"])
+        with open(options["path"], "wb") as fileobj:
+            write_snapshot(group, fileobj)
+        self.stdout.write(f"Wrote snapshot of {group.name} to {options['path']}")
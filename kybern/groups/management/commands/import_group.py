@@ -0,0 +1,18 @@
+"""Management command which loads a group snapshot written by export_group."""
+
+from django.core.management.base import BaseCommand
+
+from groups.snapshots import load_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Loads a group snapshot written by export_group, bulk creating its objects in one transaction.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+
+    def handle(self, *args, **options):
+        with open(options["path"], "rb") as fileobj:
+            counts = load_snapshot(fileobj)
+        for label, count in counts.items():
+            self.stdout.write(f"    {label}: {count}")
@@ -0,0 +1,35 @@
+"""Management command which runs the benchmarks found in each Kybern app's benchmarks module."""
+
+import importlib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Runs benchmarks comparing hot code paths against the code they replaced.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('benchmarks', nargs='*', help='Names of benchmarks to run. Defaults to all.')
+        parser.add_argument('--number', type=int, help='Number of times to run each path. Defaults vary by benchmark.')
+
+    def get_benchmarks(self):
+        benchmarks = {}
+        for app in settings.KYBERN_APPS:
+            try:
+                module = importlib.import_module(f"{app}.benchmarks")
+            except ModuleNotFoundError:
+                continue
+            benchmarks.update(module.BENCHMARKS)
+        return benchmarks
+
+    def handle(self, *args, **options):
+
+        benchmarks = self.get_benchmarks()
+
+        kwargs = {"number": options["number"]} if options["number"] else {}
+
+        for name in options["benchmarks"] or benchmarks.keys():
+            self.stdout.write(name)
+            for label, seconds in benchmarks[name](**kwargs):
+                self.stdout.write(f"    {label}: {seconds * 1000:.3f}ms per run")
@@ -0,0 +1,127 @@
+"""
+Cache of who holds which roles in each group.
+
+Permission evaluation and notification fan-out constantly need to know which users hold a role, which means
+parsing the group's role data.  Instead, we keep a dict per group, mapping each user pk to their roles and whether
+they're an owner or governor.  The dicts are memoized for the length of a request (see PermissionCacheMiddleware),
+and, if the environment configures a "memberships" cache shared by all processes, stored there across requests (see
+production_settings).  A group's entry is cleared whenever it's saved, which is how its roles and leadership change,
+and again when the save is committed (see groups.signals).
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+MEMBERSHIP_CACHE_ALIAS = "memberships"
+MEMBERSHIP_CACHE_TIMEOUT = 60 * 60
+
+
+def get_memberships_cache_key(group_pk):
+    return f"groups:memberships:{group_pk}"
+
+
+def get_users_given_role(roles, role_name):
+    """Gets pks of users with the given role, where roles is the role handler of the community the role is in."""
+
+    if role_name == "members":
+        return set(roles.get_members())
+
+    if role_name in ["owners", "governors"]:
+        leaders = roles.get_owners() if role_name == "owners" else roles.get_governors()
+        pks = set(leaders["actors"])
+        for leader_role in leaders["roles"]:
+            if leader_role != role_name:
+                pks.update(get_users_given_role(roles, leader_role))
+        return pks
+
+    return set(roles.get_custom_roles().get(role_name, []))
+
+
+def new_membership():
+    return {"roles": [], "owner": False, "governor": False}
+
+
+def compute_memberships(group):
+    """Parses the group's role data into a dict of user pks to the user's roles and leadership flags."""
+
+    roles = group.roles
+    memberships = {}
+
+    for role_name in ["members"] + list(roles.get_custom_roles().keys()):
+        for pk in get_users_given_role(roles, role_name):
+            memberships.setdefault(pk, new_membership())["roles"].append(role_name)
+
+    for pk in get_users_given_role(roles, "owners"):
+        memberships.setdefault(pk, new_membership())["owner"] = True
+    for pk in get_users_given_role(roles, "governors"):
+        memberships.setdefault(pk, new_membership())["governor"] = True
+
+    return memberships
+
+
+current_memberships = ContextVar("current_memberships", default=None)
+
+
+@contextmanager
+def membership_memo():
+    """Memoizes memberships by group pk until the block exits."""
+    token = current_memberships.set({})
+    try:
+        yield
+    finally:
+        current_memberships.reset(token)
+
+
+def get_shared_cache():
+    """Gets the memberships cache shared by all processes, or None if the environment doesn't configure one.  A
+    per-process cache would go on serving memberships that another process had cleared, so we don't fall back on
+    the default cache."""
+    return caches[MEMBERSHIP_CACHE_ALIAS] if MEMBERSHIP_CACHE_ALIAS in settings.CACHES else None
+
+
+def get_memberships(group):
+    """Gets the group's memberships from the current memo or the shared cache, computing them on a miss."""
+
+    memo = current_memberships.get()
+    if memo is not None and group.pk in memo:
+        return memo[group.pk]
+
+    shared_cache = get_shared_cache()
+    key = get_memberships_cache_key(group.pk)
+    memberships = shared_cache.get(key) if shared_cache else None
+    if memberships is None:
+        memberships = compute_memberships(group)
+        if shared_cache:
+            shared_cache.set(key, memberships, MEMBERSHIP_CACHE_TIMEOUT)
+
+    if memo is not None:
+        memo[group.pk] = memberships
+    return memberships
+
+
+def get_membership(group, user_pk):
+    """Gets the roles and leadership flags of a single user in the group."""
+    return get_memberships(group).get(user_pk, new_membership())
+
+
+def get_role_holders(group, role_name):
+    """Gets pks of users with the given role in the group, including the 'owners' and 'governors' pseudo-roles."""
+    memberships = get_memberships(group)
+    if role_name == "owners":
+        return {pk for pk, membership in memberships.items() if membership["owner"]}
+    if role_name == "governors":
+        return {pk for pk, membership in memberships.items() if membership["governor"]}
+    return {pk for pk, membership in memberships.items() if role_name in membership["roles"]}
+
+
+def clear_memberships(group_pk):
+    memo = current_memberships.get()
+    if memo:
+        memo.pop(group_pk, None)
+    shared_cache = get_shared_cache()
+    if shared_cache:
+        shared_cache.delete(get_memberships_cache_key(group_pk))
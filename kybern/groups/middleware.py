@@ -0,0 +1,23 @@
+from django.conf import settings
+
+from .memberships import membership_memo
+from .permissions import permission_decision_cache
+
+
+class PermissionCacheMiddleware:
+    """Gives each request its own permission decision cache and memo of group memberships.  In DEBUG, reports the
+    decision cache's hits and misses in the response headers."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+
+        with permission_decision_cache() as cache, membership_memo():
+            response = self.get_response(request)
+
+        if settings.DEBUG:
+            response["X-Permission-Cache-Hits"] = cache.hits
+            response["X-Permission-Cache-Misses"] = cache.misses
+
+        return response
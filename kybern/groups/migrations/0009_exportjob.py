@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('accounts', '0004_notificationssettings_always_notify_action_resolved'),
+        ('groups', '0008_post_forum_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.PositiveIntegerField()),
+                ('export_format', models.CharField(choices=[('csv', 'CSV'), ('json', 'JSON')], max_length=4)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], default='queued', max_length=8)),
+                ('artifact', models.FileField(blank=True, upload_to='exports/')),
+                ('error', models.CharField(blank=True, max_length=500)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='groups.Group')),
+                ('item_content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.User')),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0009_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogSequence',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='groups.Group')),
+                ('last_sequence', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('action_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('item_model', models.CharField(max_length=60)),
+                ('item_id', models.PositiveIntegerField()),
+                ('change', models.CharField(choices=[('created', 'Created'), ('edited', 'Edited'), ('deleted', 'Deleted')], max_length=7)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='groups.Group')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='changelogentry',
+            constraint=models.UniqueConstraint(fields=('group', 'sequence'), name='groups_changelog_group_sequence'),
+        ),
+    ]
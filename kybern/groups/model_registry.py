@@ -0,0 +1,33 @@
+"""
+Registry of the models which the API can look up by name, such as when the frontend passes in an item_model.
+
+Only the models the frontend works with are exposed, so that a request can't name, say, a condition or user model and
+have it loaded.  The registry is built once, when the app is ready, and names are matched case-insensitively.
+"""
+
+from functools import lru_cache
+
+from django.apps import apps
+
+
+EXPOSED_MODELS = [
+    "groups.Group", "groups.Forum", "groups.Post",
+    "resources.SimpleList", "resources.Document", "resources.Comment",
+    "permission_resources.PermissionsItem",
+    "actions.Action", "actions.TemplateModel"
+]
+
+
+@lru_cache(maxsize=None)
+def get_model_registry():
+    """Returns a dict of lowercased model names to model classes."""
+    models = [apps.get_model(label) for label in EXPOSED_MODELS]
+    return {model._meta.model_name: model for model in models}
+
+
+def get_model(model_name):
+    """Gets the exposed model with the given name, raising LookupError for unknown or unexposed models."""
+    try:
+        return get_model_registry()[model_name.lower()]
+    except (KeyError, AttributeError):
+        raise LookupError(f"No exposed model named {model_name}")
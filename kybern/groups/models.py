@@ -1,13 +1,15 @@
 import importlib, inspect, json
 
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.utils import timezone
 
 from concord.communities.models import BaseCommunityModel
 from concord.actions.models import PermissionedModel
-from concord.utils.helpers import Client
 
 from accounts.models import User
+from .exports import EXPORT_CHUNK_SIZE, chunked, get_comments_by_target_pk
 
 
 class Group(BaseCommunityModel):
@@ -30,17 +32,26 @@ class Forum(PermissionedModel):
         return [self.get_owner()]
 
     def get_json_data(self):
-        post_data = []
-        for post in self.post_set.all():
-            comment_data = [comment.export() for comment in Client(target=post).Comment.get_all_comments_on_target()]
-            post_data.append({
+        return "".join(self.iter_json_data())
+
+    def iter_json_data(self, chunk_size=EXPORT_CHUNK_SIZE):
+        """Yields the forum as JSON a chunk of posts at a time, loading the comments for each chunk in one query."""
+
+        yield json.dumps({"name": self.name, "description": self.description})[:-1] + ', "posts": ['
+
+        posts = self.post_set.select_related("author").order_by("created", "pk").iterator(chunk_size=chunk_size)
+        for index, chunk in enumerate(chunked(posts, chunk_size)):
+            comments = get_comments_by_target_pk(Post, [post.pk for post in chunk])
+            post_data = [json.dumps({
                 "title": post.title,
                 "content": post.content,
                 "created": str(post.created),
                 "author": post.author.username,
-                "comments": comment_data
-            })
-        return json.dumps({"name": self.name, "description": self.description, "posts": post_data})
+                "comments": [comment.export() for comment in comments.get(post.pk, [])]
+            }) for post in chunk]
+            yield (", " if index else "") + ", ".join(post_data)
+
+        yield "]}"
 
 
 class Post(PermissionedModel):
@@ -50,8 +61,80 @@ class Post(PermissionedModel):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     forum = models.ForeignKey(Forum, on_delete=models.CASCADE)
 
+    class Meta(PermissionedModel.Meta):
+        indexes = [models.Index(fields=["forum", "created", "id"], name="groups_post_forum_created")]
+
     def get_name(self):
         return self.title
 
     def get_nested_objects(self):
         return [self.get_owner(), self.forum]
+
+
+class ExportJob(models.Model):
+    """An export of a group's item which runs in the background, along with the file it produced."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    group = models.ForeignKey(Group, on_delete=models.CASCADE)
+    item_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    item_id = models.PositiveIntegerField()
+    item = GenericForeignKey('item_content_type', 'item_id')
+    EXPORT_FORMAT_CHOICES = (
+        ('csv', 'CSV'),
+        ('json', 'JSON'),
+    )
+    export_format = models.CharField(max_length=4, choices=EXPORT_FORMAT_CHOICES)
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('finished', 'Finished'),
+        ('failed', 'Failed'),
+    )
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default="queued")
+    artifact = models.FileField(upload_to="exports/", blank=True)
+    error = models.CharField(max_length=500, blank=True)
+    created = models.DateTimeField(default=timezone.now)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    def get_filename(self):
+        return f"{self.item.get_name()}.{self.export_format}"
+
+    def check_artifact(self):
+        """The artifact is written by the worker, so if the web processes don't share its storage (see MEDIA_ROOT in
+        settings), or the file has since been removed, a finished job may have no artifact to download.  In that case
+        we mark the job failed, so the user can start a new one.  Returns whether the artifact is available."""
+        if self.status != "finished":
+            return False
+        if self.artifact and self.artifact.storage.exists(self.artifact.name):
+            return True
+        self.status = "failed"
+        self.error = "The exported file is no longer available, please export again."
+        self.save(update_fields=["status", "error"])
+        return False
+
+
+class ChangeLogSequence(models.Model):
+    """The last sequence number given to an entry in a group's change feed.  Entries take the next number while
+    holding a lock on this row, so a group's entries are committed in sequence order.  Otherwise a client could see
+    a later entry before an earlier one is committed, and skip the earlier one when it asks for changes since."""
+    group = models.OneToOneField(Group, on_delete=models.CASCADE, primary_key=True)
+    last_sequence = models.PositiveIntegerField(default=0)
+
+
+class ChangeLogEntry(models.Model):
+    """Records an item in a group being created, edited or deleted by an action.  Sequence numbers increase with
+    each entry in a group (see ChangeLogSequence), and are what clients ask for changes since."""
+    group = models.ForeignKey(Group, on_delete=models.CASCADE)
+    sequence = models.PositiveIntegerField()
+    action_id = models.PositiveIntegerField(null=True, blank=True)
+    item_model = models.CharField(max_length=60)
+    item_id = models.PositiveIntegerField()
+    CHANGE_CHOICES = (
+        ('created', 'Created'),
+        ('edited', 'Edited'),
+        ('deleted', 'Deleted'),
+    )
+    change = models.CharField(max_length=7, choices=CHANGE_CHOICES)
+    created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["group", "sequence"], name="groups_changelog_group_sequence")]
@@ -0,0 +1,67 @@
+"""
+Cursor-based pagination for querysets keyed on a date field and pk.
+
+Cursors are strings of the form '<isoformat date>_<pk>'.  Paging backwards through history with `before` returns
+items newest first, while catching up with `since` returns items newer than the cursor, oldest first, so that
+clients can fetch new items incrementally instead of reloading everything.
+"""
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(instance, date_field):
+    return f"{getattr(instance, date_field).isoformat()}_{instance.pk}"
+
+
+def decode_cursor(cursor):
+    date_string, pk = cursor.rsplit("_", 1)
+    date = parse_datetime(date_string)
+    if date is None:
+        raise ValueError(f"Cursor {cursor} does not contain a valid date")
+    return date, int(pk)
+
+
+def get_page_size(page_size=None):
+    """Returns the requested page size, capped at MAX_PAGE_SIZE, or the default if none is requested."""
+    if not page_size:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(page_size), MAX_PAGE_SIZE))
+
+
+def paginate_by_cursor(queryset, date_field, before=None, since=None, page_size=None):
+    """Gets a page of items from the queryset.  Returns a tuple of the items, the cursor to pass in to get the next
+    page in the same direction (None if there are no more items), and the cursor of the newest item returned, which
+    can be passed in as `since` later to fetch only newer items.  The latest cursor is None when paging backwards
+    with `before`, since the client already has newer items."""
+
+    page_size = get_page_size(page_size)
+
+    if since:
+        date, pk = decode_cursor(since)
+        queryset = queryset.filter(Q(**{f"{date_field}__gt": date}) | Q(**{date_field: date, "pk__gt": pk}))
+        queryset = queryset.order_by(date_field, "pk")
+    else:
+        if before:
+            date, pk = decode_cursor(before)
+            queryset = queryset.filter(Q(**{f"{date_field}__lt": date}) | Q(**{date_field: date, "pk__lt": pk}))
+        queryset = queryset.order_by(f"-{date_field}", "-pk")
+
+    items = list(queryset[:page_size + 1])
+    has_more = len(items) > page_size
+    items = items[:page_size]
+
+    next_cursor = encode_cursor(items[-1], date_field) if has_more else None
+
+    if since:
+        latest_cursor = encode_cursor(items[-1], date_field) if items else since
+    elif before:
+        latest_cursor = None
+    else:
+        latest_cursor = encode_cursor(items[0], date_field) if items else None
+
+    return items, next_cursor, latest_cursor
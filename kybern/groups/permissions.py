@@ -0,0 +1,166 @@
+"""
+Helpers for evaluating permissions in bulk.
+
+Working out which users satisfy a permission is done by expanding its actors and roles into a set of user pks, using
+the cached role memberships in groups.memberships, so that checking many users against the same permissions is a set
+lookup rather than a permission check per user.
+Checking many permissions for one user is done by grouping the checks by target, so each target is loaded once.
+Permission decisions are also memoized for the length of a request, see PermissionDecisionCache.
+"""
+
+import json
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from concord.utils.helpers import Client
+
+from .memberships import get_role_holders
+
+
+class ActorSet:
+    """A set of user pks.  If any permission added to the set can be used by anyone, every user is in the set."""
+
+    def __init__(self, pks=None, anyone=False):
+        self.pks = set(pks) if pks else set()
+        self.anyone = anyone
+
+    def __contains__(self, pk):
+        return self.anyone or pk in self.pks
+
+    def __bool__(self):
+        return self.anyone or bool(self.pks)
+
+    def update(self, other):
+        self.pks.update(other.pks)
+        self.anyone = self.anyone or other.anyone
+
+
+def get_actors_for_permission(permission):
+    """Gets an ActorSet of everyone who satisfies the permission's actors and roles."""
+
+    if permission.anyone:
+        return ActorSet(anyone=True)
+
+    group = permission.get_owner()
+    pks = set(permission.get_actors())
+    for role_name in permission.get_roles():
+        pks.update(get_role_holders(group, role_name))
+
+    return ActorSet(pks)
+
+
+def get_eligible_actors_for_action(action):
+    """Gets an ActorSet of everyone with a permission on any of the decision-making conditions triggered by the
+    action, ie everyone who may be eligible to participate in a decision about it."""
+
+    actors = ActorSet()
+    client = Client()
+
+    for condition in client.Conditional.get_condition_items_for_action(action_pk=action.pk):
+        for permission in client.PermissionResource.get_permissions_on_object(target_object=condition):
+            actors.update(get_actors_for_permission(permission))
+
+    return actors
+
+
+class PermissionDecisionCache:
+    """Memoizes permission decisions for the length of a request, counting hits and misses.  Taking an action
+    can change permissions, so the cache is cleared whenever an action is implemented (see groups.signals)."""
+
+    def __init__(self):
+        self.decisions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        if key in self.decisions:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.decisions[key] = compute()
+        return self.decisions[key]
+
+    def clear(self):
+        self.decisions = {}
+
+
+current_decision_cache = ContextVar("current_decision_cache", default=None)
+
+
+@contextmanager
+def permission_decision_cache():
+    """Makes a new decision cache current until the block exits.  Used by PermissionCacheMiddleware."""
+    cache = PermissionDecisionCache()
+    token = current_decision_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        current_decision_cache.reset(token)
+
+
+def clear_permission_decisions():
+    cache = current_decision_cache.get()
+    if cache:
+        cache.clear()
+
+
+def memoize_decision(key, compute):
+    """Looks the decision up in the current request's cache, computing it on a miss.  Outside of a request
+    there's no cache, so the decision is always computed."""
+    cache = current_decision_cache.get()
+    return cache.get_or_compute(key, compute) if cache else compute()
+
+
+def has_permission(client, target_client, permission_name, params=None, exclude_conditional=True):
+    """Memoized wrapper around client.PermissionResource.has_permission, keyed on actor, target, permission name
+    and params."""
+    actor, target = target_client.PermissionResource.actor, target_client.PermissionResource.target
+    key = ("has_permission", actor.pk, target.__class__.__name__, target.pk, permission_name,
+           json.dumps(params, sort_keys=True, default=str), exclude_conditional)
+    return memoize_decision(key, lambda: client.PermissionResource.has_permission(
+        target_client, permission_name, params, exclude_conditional=exclude_conditional))
+
+
+def actor_satisfies_permission(actor, permission):
+    """Memoized check of whether the actor is in the permission's actors or roles."""
+    key = ("actor_satisfies_permission", actor.pk, permission.pk)
+    return memoize_decision(key, lambda: actor.pk in get_actors_for_permission(permission))
+
+
+def resolve_alt_target(client, alt_target):
+    """Gets the object referred to by an alt_target string of the form '<model>_<pk>'."""
+    model, pk = alt_target.split("_")
+    if model == "action":
+        """Action is not a PermissionedModel but rarely gets set as target (through
+        comments mostly), we automatically give people access to Action comments"""
+        return "action"
+    return client.Action.get_object_given_model_and_pk(model, int(pk))
+
+
+def check_permissions_in_bulk(actor, default_target, permissions):
+    """Takes a dict of permission names to params, as sent by the Vuex store, where params may include an
+    alt_target to check against instead of the default target.  Checks are grouped by target, so each target is
+    loaded and given a client only once no matter how many permissions are checked against it.  Returns a dict of
+    permission names to booleans, in the order the permissions were given."""
+
+    client = Client(actor=actor, target=default_target)
+
+    checks_by_target = OrderedDict()
+    for permission_name, params in permissions.items():
+        alt_target = params.pop("alt_target", None) if params else None
+        checks_by_target.setdefault(alt_target, []).append((permission_name, params))
+
+    results = {}
+    for alt_target, checks in checks_by_target.items():
+
+        target = resolve_alt_target(client, alt_target) if alt_target else default_target
+        if target == "action":
+            results.update({permission_name: True for permission_name, params in checks})
+            continue
+
+        target_client = Client(actor=actor, target=target)
+        for permission_name, params in checks:
+            results[permission_name] = has_permission(client, target_client, permission_name, params)
+
+    return {permission_name: results[permission_name] for permission_name in permissions}
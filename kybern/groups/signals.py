@@ -1,11 +1,16 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 
+from concord.actions.models import Action
 from concord.utils.helpers import Changes
 from concord.permission_resources.utils import set_default_permissions
 
+from .change_feed import record_action_change, record_change
 from .models import Group, Forum
+from .memberships import clear_memberships
+from .permissions import clear_permission_decisions
 
 
 @receiver(post_save, sender=Group)
@@ -19,3 +24,35 @@ def retry_action(sender, instance, created, **kwargs):
         actor_pk = instance.roles.get_owners(actors_only=True)[0]
         actor = User.objects.get(pk=actor_pk)
         set_default_permissions(actor, forum)
+
+
+@receiver(post_save, sender=Action)
+def clear_permission_decisions_on_action(sender, instance, created, **kwargs):
+    """Implemented actions may change permissions, so we forget any permission decisions made earlier in the
+    current request."""
+    if instance.status == "implemented":
+        clear_permission_decisions()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def clear_cached_memberships(sender, instance, **kwargs):
+    """Roles and leadership are saved on the group, so whenever it's saved its cached memberships are out of date.
+    We clear them again once the transaction commits, in case another process cached the old memberships while the
+    transaction was in progress."""
+    group_pk = instance.pk
+    clear_memberships(group_pk)
+    transaction.on_commit(lambda: clear_memberships(group_pk))
+
+
+@receiver(post_save)
+def record_created_item(sender, instance, created, raw=False, **kwargs):
+    """Logs items created in a group to its change feed.  Items loaded from a snapshot aren't new to anyone."""
+    if created and not raw:
+        record_change(instance, "created")
+
+
+@receiver(post_save, sender=Action)
+def record_action_change_on_implementation(sender, instance, created, **kwargs):
+    """Logs the change an action made to its target to the group's change feed, once it's implemented."""
+    record_action_change(instance)
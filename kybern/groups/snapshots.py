@@ -0,0 +1,119 @@
+"""
+Whole-group snapshots, for backups and for moving a group between instances.
+
+A snapshot is gzipped, newline-delimited JSON.  Each line is one object in Django's serialization format, with
+foreign keys to content types written as natural keys, since content type pks differ between instances.  The group
+comes first, then every object it owns
+(forums, posts, comments, lists, documents, permissions, conditions and so on), then the actions taken on any of
+them.  Loading a snapshot is a bulk_create per batch of objects rather than a replay of its actions.
+
+Snapshots keep primary keys, since Concord stores references to objects and users as pks inside JSON fields such
+as roles and permission actors.  Restoring therefore needs the group's users to exist with the same pks and the
+snapshot's pks to be free, as when restoring a backup or loading into a fresh instance.
+"""
+
+import gzip, json
+from functools import lru_cache
+from itertools import groupby
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from concord.actions.models import Action, PermissionedModel
+from concord.communities.models import BaseCommunityModel
+
+from .exports import EXPORT_CHUNK_SIZE, chunked
+from .memberships import clear_memberships
+
+
+def get_owned_models():
+    """Gets the concrete models which groups can own, ordered so models come after those they have foreign keys to."""
+
+    models = [model for model in apps.get_models() if issubclass(model, PermissionedModel)
+              and not issubclass(model, BaseCommunityModel) and not model._meta.proxy]
+
+    def depends_on_owned_model(model):
+        return any(field.related_model in models for field in model._meta.concrete_fields if field.is_relation)
+
+    return sorted(models, key=depends_on_owned_model)
+
+
+@lru_cache(maxsize=None)
+def get_content_type_fields(model_label):
+    """Gets the names of the model's foreign keys to ContentType."""
+    return [field.name for field in apps.get_model(model_label)._meta.concrete_fields
+            if field.is_relation and field.related_model is ContentType]
+
+
+def serialize_objects(objects):
+    """Serializes objects with foreign keys to content types as natural keys.  We don't use Django's
+    use_natural_foreign_keys, since it would also write users as natural keys, which the accounts.User proxy's
+    manager can't look up, and users keep their pks anyway (see above)."""
+    for data in serializers.serialize("python", objects):
+        for field_name in get_content_type_fields(data["model"]):
+            if data["fields"][field_name] is not None:
+                content_type = ContentType.objects.get_for_id(data["fields"][field_name])
+                data["fields"][field_name] = list(content_type.natural_key())
+        yield json.dumps(data, cls=DjangoJSONEncoder) + "\n"
+
+
+def iter_snapshot_lines(group, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields the group and everything it owns, followed by the action history of all of it, one line per object."""
+
+    yield from serialize_objects([group])
+    targets = {group.__class__: [group.pk]}
+
+    group_content_type = ContentType.objects.get_for_model(group)
+    for model in get_owned_models():
+        queryset = model.objects.filter(owner_content_type=group_content_type, owner_object_id=group.pk)
+        for chunk in chunked(queryset.order_by("pk").iterator(chunk_size=chunk_size), chunk_size):
+            targets.setdefault(model, []).extend(item.pk for item in chunk)
+            yield from serialize_objects(chunk)
+
+    for model, pks in targets.items():
+        content_type = ContentType.objects.get_for_model(model)
+        for pk_chunk in chunked(pks, chunk_size):
+            actions = Action.objects.filter(content_type=content_type, object_id__in=pk_chunk).order_by("pk")
+            yield from serialize_objects(actions)
+
+
+def write_snapshot(group, fileobj):
+    """Writes a compressed snapshot of the group to a binary file object."""
+    with gzip.open(fileobj, "wt", encoding="utf-8") as snapshot:
+        for line in iter_snapshot_lines(group):
+            snapshot.write(line)
+
+
+def reset_sequences(models):
+    """Objects are created with their original pks, so the database's pk sequences need to catch up."""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def load_snapshot(fileobj, batch_size=EXPORT_CHUNK_SIZE):
+    """Bulk creates the objects in a compressed snapshot, all in one transaction.  Signals aren't sent, so loading
+    a group doesn't, for instance, create a second governance forum.  Returns a dict of model labels to the number
+    of objects created."""
+
+    counts = {}
+
+    with transaction.atomic(), gzip.open(fileobj, "rt", encoding="utf-8") as snapshot:
+
+        lines = (json.loads(line) for line in snapshot)
+        for batch in chunked(lines, batch_size):
+            objects = serializers.deserialize("python", batch, handle_forward_references=True)
+            for model, deserialized_objects in groupby(objects, key=lambda deserialized: deserialized.object.__class__):
+                created = model.objects.bulk_create([deserialized.object for deserialized in deserialized_objects])
+                counts[model] = counts.get(model, 0) + len(created)
+                if issubclass(model, BaseCommunityModel):
+                    for group in created:
+                        clear_memberships(group.pk)
+
+        reset_sequences(list(counts.keys()))
+
+    return {model._meta.label: count for model, count in counts.items()}
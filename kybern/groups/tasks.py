@@ -0,0 +1,33 @@
+import logging, tempfile
+
+from django.core.files import File
+from django.utils import timezone
+
+from .exports import iter_export
+from .models import ExportJob
+
+
+logger = logging.getLogger(__name__)
+
+
+def run_export_job(job_pk):
+    """Writes the job's export to a temporary file a chunk at a time, then saves it to storage as the artifact."""
+
+    job = ExportJob.objects.get(pk=job_pk)
+    job.status = "running"
+    job.save(update_fields=["status"])
+
+    try:
+        with tempfile.TemporaryFile() as artifact:
+            for chunk in iter_export(job.item, job.export_format):
+                artifact.write(chunk.encode("utf-8"))
+            artifact.seek(0)
+            job.artifact.save(job.get_filename(), File(artifact), save=False)
+        job.status = "finished"
+    except Exception as error:
+        logger.exception(f"Export job {job_pk} failed")
+        job.status = "failed"
+        job.error = str(error)[:500]
+
+    job.finished = timezone.now()
+    job.save()
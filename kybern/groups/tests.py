@@ -1,8 +1,37 @@
-import json
+import asyncio, gzip, io, json, tempfile
+from unittest.mock import patch
 
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from concord.actions.models import Action
+from concord.permission_resources.models import PermissionsItem
+from concord.utils.helpers import Changes, Client
+
+from groups.asgi import route_group_events
+from groups.events import get_broker
+from groups.memberships import get_membership, get_memberships, get_role_holders, membership_memo
+from groups.models import ChangeLogEntry, Group, Forum, Post
+from groups.model_registry import get_model
+from groups.pagination import paginate_by_cursor
+from groups.permissions import (check_permissions_in_bulk, has_permission, permission_decision_cache,
+                               resolve_alt_target)
+from groups.snapshots import load_snapshot, write_snapshot
+from groups.url_map import get_urls, reverse_urls
+from groups.views import (process_action, process_actions, get_permission_catalog,
+                          serialize_existing_permission_for_vue, serialize_existing_permissions_for_vue)
+
+
+def count_queries(function, *args, **kwargs):
+    with CaptureQueriesContext(connection) as queries:
+        function(*args, **kwargs)
+    return len(queries)
+
 
 class UrlTestCase(TestCase):
     maxDiff = None
@@ -15,6 +44,8 @@ class UrlTestCase(TestCase):
                 "apply_template":"groups/api/apply_template/",
                 "get_templates_for_scope":"groups/api/get_templates_for_scope/",
                 "get_comment_data":"groups/api/get_comment_data/",
+                "get_comment_threads":"groups/api/get_comment_threads/",
+                "search_users":"groups/api/search_users/",
                 "update_consensus_condition":"groups/api/update_consensus_condition/",
                 "update_vote_condition":"groups/api/update_vote_condition/",
                 "get_conditional_data":"groups/api/get_conditional_data/",
@@ -38,6 +69,7 @@ class UrlTestCase(TestCase):
             "apply_template":"groups/api/apply_template/",
             "get_templates_for_scope":"groups/api/get_templates_for_scope/",
             "get_comment_data":"groups/api/get_comment_data/",
+            "get_comment_threads":"groups/api/get_comment_threads/",
             "get_post":"groups/api/1/get_post/",
             "get_posts_for_forum":"groups/api/1/get_posts/",
             "get_forum":"groups/api/1/get_forum/",
@@ -62,7 +94,12 @@ class UrlTestCase(TestCase):
             "get_data_for_role":"groups/api/get_data_for_role/1/",
             "take_proposed_action":"groups/api/1/take_proposed_action",
             "take_action":"groups/api/1/take_action",
+            "take_actions":"groups/api/1/take_actions",
             "get_forum_data":"groups/api/get_forum_data/1/",
+            "get_bootstrap_data":"groups/api/get_bootstrap_data/1/",
+            "get_changes":"groups/api/1/get_changes/",
+            "group_events":"groups/api/1/events/",
+            "search_users":"groups/api/search_users/",
             "get_permission_data":"groups/api/get_permission_data/1/",
             "get_governance_data":"groups/api/get_governance_data/1/",
             "generate_url_map_with_target":"groups/api/get_urls/1/",
@@ -70,9 +107,607 @@ class UrlTestCase(TestCase):
             "create_group":"groups/create-group/",
             "export_as_json":"groups/export/json/1",
             "export_as_csv":"groups/export/csv/1",
+            "start_export_job":"groups/api/1/start_export_job/",
+            "get_export_job":"groups/api/1/get_export_job/",
             "group_create":"groups/create/",
             "group_list":"groups/list/"
         }
         response = self.client.get(reverse('generate_url_map_with_target', kwargs={"target": 1}))
         self.assertEquals(response.json()['urls'], expected_dict)
         self.assertEquals(len(response.json()['urls']), len(expected_dict))
+
+    def test_url_templates_match_reversed_urls(self):
+        self.assertEquals(get_urls(), reverse_urls())
+        for target in [1, 23, 8675]:
+            self.assertEquals(get_urls(target=target), reverse_urls(target=target))
+
+
+class ActionDataTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("meganrapinoe", "shaunagm@gmail.com", "badlands2020")
+        self.concord_client = Client(actor=self.user)
+        self.group = self.concord_client.Community.create_community(name="USWNT")
+        self.concord_client.update_target_on_all(self.group)
+        self.concord_client.Group.edit_group(description="The best team")
+        self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+
+    def test_process_actions_matches_process_action(self):
+        actions = list(self.concord_client.Action.get_action_history_given_target())
+        self.assertTrue(actions)
+        self.assertEquals(process_actions(actions), [process_action(action) for action in actions])
+
+    def test_process_actions_query_count_does_not_grow_with_actions(self):
+        for i in range(10):
+            self.concord_client.Group.edit_group(description=f"The best team, {i} times over")
+        pks = list(self.concord_client.Action.get_action_history_given_target().order_by("-created_at", "-pk")
+                   .values_list("pk", flat=True)[:10])
+        queries_for_two = count_queries(process_actions, Action.objects.filter(pk__in=pks[:2]))
+        with self.assertNumQueries(queries_for_two):
+            process_actions(Action.objects.filter(pk__in=pks))
+
+    def test_paginate_actions_by_cursor(self):
+        self.concord_client.get_method("add_forum")(name="Fitness", description="Talk fitness")
+        history = self.concord_client.Action.get_action_history_given_target()
+        expected_pks = list(history.order_by("-created_at", "-pk").values_list("pk", flat=True))
+
+        # page backwards through history one action at a time
+        actions, next_cursor, latest_cursor = paginate_by_cursor(history, "created_at", page_size=1)
+        paged_pks = [action.pk for action in actions]
+        while next_cursor:
+            actions, next_cursor, _ = paginate_by_cursor(history, "created_at", before=next_cursor, page_size=1)
+            paged_pks += [action.pk for action in actions]
+        self.assertEquals(paged_pks, expected_pks)
+
+        # nothing new since the latest action, until a new action is taken
+        actions, next_cursor, same_cursor = paginate_by_cursor(history, "created_at", since=latest_cursor)
+        self.assertEquals((actions, next_cursor, same_cursor), ([], None, latest_cursor))
+        self.concord_client.Group.edit_group(description="Still the best team")
+        actions, next_cursor, new_cursor = paginate_by_cursor(history, "created_at", since=latest_cursor)
+        self.assertEquals(len(actions), 1)
+        self.assertNotEqual(new_cursor, latest_cursor)
+
+
+class GroupViewsTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("meganrapinoe", "shaunagm@gmail.com", "badlands2020")
+        self.concord_client = Client(actor=self.user)
+        self.group = self.concord_client.Community.create_community(name="USWNT")
+        self.concord_client.update_target_on_all(self.group)
+        self.client.force_login(self.user)
+
+    def post(self, url_name, data=None, **url_kwargs):
+        return self.client.post(reverse(url_name, kwargs=url_kwargs), json.dumps(data or {}),
+                                content_type="application/json").json()
+
+    def test_permission_data_uses_cached_catalog(self):
+        response = self.post("get_permission_data", target=self.group.pk)
+        catalog = get_permission_catalog()
+        self.assertIs(catalog, get_permission_catalog())
+        self.assertEquals({key: response[key] for key in catalog}, json.loads(json.dumps(catalog, cls=DjangoJSONEncoder)))
+        self.assertIn("owner_condition", response)
+        self.assertIn("governor_condition", response)
+
+    def test_bulk_permission_serialization_matches_single(self):
+        self.concord_client.PermissionResource.add_permission(change_type=Changes().Communities.AddRole,
+                                                              roles=["members"])
+        self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        permissions = list(self.concord_client.PermissionResource.get_all_permissions_in_community(
+            community=self.group))
+        self.assertTrue(permissions)
+        expected = {}
+        for permission in permissions:
+            expected.update(serialize_existing_permission_for_vue(permission))
+        self.assertEquals(serialize_existing_permissions_for_vue(permissions), expected)
+
+    def test_bulk_permission_serialization_query_count_does_not_grow_with_permissions(self):
+        pks = [self.concord_client.PermissionResource.add_permission(change_type=Changes().Communities.AddRole,
+                                                                     roles=["members"])[1].pk for i in range(10)]
+        queries_for_two = count_queries(serialize_existing_permissions_for_vue,
+                                        PermissionsItem.objects.filter(pk__in=pks[:2]))
+        with self.assertNumQueries(queries_for_two):
+            serialize_existing_permissions_for_vue(PermissionsItem.objects.filter(pk__in=pks))
+
+    def test_check_permissions_matches_check_permission(self):
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        permissions = {
+            "add_forum": {}, "add_role_to_community": {"role_name": "forwards"},
+            "edit_forum": {"alt_target": f"forum_{forum.pk}"}, "delete_forum": {"alt_target": f"forum_{forum.pk}"},
+            "add_comment": {"alt_target": f"action_{action.pk}"}
+        }
+        expected = {}
+        for permission_name, params in permissions.items():
+            params = dict(params)
+            alt_target = params.pop("alt_target", None)
+            if alt_target and alt_target.startswith("action_"):
+                expected[permission_name] = True   # people automatically have access to action comments
+                continue
+            response = self.post("check_permission", {"permission_name": permission_name, "alt_target": alt_target,
+                                                      "params": params}, target=self.group.pk)
+            expected.update(response["user_permissions"])
+        response = self.post("check_permissions", {"permissions": permissions}, target=self.group.pk)
+        self.assertEquals(response["user_permissions"], expected)
+
+    def test_check_permissions_loads_each_target_once(self):
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        names = ["edit_forum", "delete_forum", "add_post"]
+        check = lambda names: check_permissions_in_bulk(self.user, self.group,
+                                                        {name: {"alt_target": f"forum_{forum.pk}"} for name in names})
+        check(names)   # warm up caches, such as content types, so every count below starts from the same state
+        queries_to_resolve = count_queries(resolve_alt_target, self.concord_client, f"forum_{forum.pk}")
+        queries_one_at_a_time = sum(count_queries(check, [name]) for name in names)
+        with self.assertNumQueries(queries_one_at_a_time - queries_to_resolve * (len(names) - 1)):
+            check(names)
+
+    def test_permission_decisions_are_memoized_until_an_action_is_implemented(self):
+        with permission_decision_cache() as cache:
+            for i in range(3):
+                has_permission(self.concord_client, self.concord_client, "add_forum", {})
+            self.assertEquals((cache.hits, cache.misses), (2, 1))
+            self.concord_client.Community.add_role_to_community(role_name="forwards")
+            has_permission(self.concord_client, self.concord_client, "add_forum", {})
+            self.assertEquals((cache.hits, cache.misses), (2, 2))
+
+    @override_settings(DEBUG=True)
+    def test_permission_cache_counts_are_reported_in_debug(self):
+        response = self.client.post(reverse("check_permission", kwargs={"target": self.group.pk}),
+                                    json.dumps({"permission_name": "add_forum", "params": {}}),
+                                    content_type="application/json")
+        self.assertEquals(response["X-Permission-Cache-Hits"], "0")
+        self.assertEquals(response["X-Permission-Cache-Misses"], "1")
+
+    def test_memberships_are_memoized_until_group_roles_change(self):
+        other_user = User.objects.create_user("christenpress", "shaunagm@gmail.com", "badlands2020")
+        self.concord_client.Community.add_members_to_community(member_pk_list=[other_user.pk])
+        with membership_memo():
+            self.assertEquals(get_role_holders(self.group, "members"), {self.user.pk, other_user.pk})
+            self.assertEquals(get_membership(self.group, self.user.pk)["roles"], ["members"])
+            self.assertTrue(get_membership(self.group, self.user.pk)["owner"])
+            with patch("groups.memberships.compute_memberships") as compute_memberships:
+                get_membership(self.group, other_user.pk)
+                compute_memberships.assert_not_called()
+            self.concord_client.Community.add_role_to_community(role_name="forwards")
+            self.concord_client.Community.add_people_to_role(role_name="forwards", people_to_add=[other_user.pk])
+            self.assertEquals(get_membership(self.group, other_user.pk),
+                              {"roles": ["members", "forwards"], "owner": False, "governor": False})
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+                               "memberships": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_memberships_are_shared_across_requests_when_a_cache_is_configured(self):
+        with membership_memo():
+            get_memberships(self.group)
+        with membership_memo(), patch("groups.memberships.compute_memberships") as compute_memberships:
+            self.assertIn(self.user.pk, get_memberships(self.group))
+            compute_memberships.assert_not_called()
+        self.concord_client.Community.add_role_to_community(role_name="forwards")
+        with membership_memo(), patch("groups.memberships.compute_memberships") as compute_memberships:
+            get_memberships(self.group)
+            compute_memberships.assert_called_once()
+
+    def test_memberships_are_computed_each_time_outside_a_request_without_a_shared_cache(self):
+        with patch("groups.memberships.compute_memberships", return_value={}) as compute_memberships:
+            get_memberships(self.group)
+            get_memberships(self.group)
+        self.assertEquals(compute_memberships.call_count, 2)
+
+    def test_posts_and_comments_include_their_authors_names(self):
+        # governance data only lists current members, so items by people who've left need to carry their own names
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        self.concord_client.update_target_on_all(forum)
+        action, post = self.concord_client.get_method("add_post")(title="Pressing", content="Press high")
+        self.concord_client.update_target_on_all(post)
+        action, comment = self.concord_client.get_method("add_comment")(text="Run at them")
+
+        response = self.post("get_posts_for_forum", {"forum_pk": forum.pk}, target=self.group.pk)
+        self.assertEquals(response["posts"][0]["author_name"], "meganrapinoe")
+        response = self.post("get_comment_threads", {"targets": [{"item_model": "post", "item_id": post.pk}]})
+        self.assertEquals(response["comments"][str(comment.pk)]["commenter_name"], "meganrapinoe")
+
+    def test_paginate_posts_for_forum(self):
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        self.concord_client.update_target_on_all(forum)
+        for title in ["Pressing", "Set pieces", "Counters"]:
+            self.concord_client.get_method("add_post")(title=title, content=f"Thoughts on {title.lower()}")
+
+        response = self.post("get_posts_for_forum", {"forum_pk": forum.pk, "page_size": 2}, target=self.group.pk)
+        self.assertEquals([post["title"] for post in response["posts"]], ["Counters", "Set pieces"])
+        response = self.post("get_posts_for_forum", {"forum_pk": forum.pk, "page_size": 2,
+                                                     "before": response["next_cursor"]}, target=self.group.pk)
+        self.assertEquals([post["title"] for post in response["posts"]], ["Pressing"])
+        self.assertIsNone(response["next_cursor"])
+
+        response = self.post("get_posts_for_forum", {"forum_pk": forum.pk, "summary": True}, target=self.group.pk)
+        self.assertEquals(len(response["posts"]), 3)
+        self.assertTrue(all("content" not in post for post in response["posts"]))
+
+    def test_forum_json_export_streams_posts_and_comments(self):
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        self.concord_client.update_target_on_all(forum)
+        for title in ["Pressing", "Set pieces", "Counters"]:
+            action, post = self.concord_client.get_method("add_post")(title=title, content=f"On {title.lower()}")
+        self.concord_client.update_target_on_all(post)
+        self.concord_client.get_method("add_comment")(text="Run at them")
+
+        response = self.client.get(reverse("export_as_json", kwargs={"target": self.group.pk}),
+                                   {"item_id": forum.pk, "item_model": "forum"})
+        self.assertTrue(response.streaming)
+        exported = json.loads(b"".join(response.streaming_content))
+        self.assertEquals(exported, json.loads("".join(forum.iter_json_data(chunk_size=2))))
+        self.assertEquals([post["title"] for post in exported["posts"]], ["Pressing", "Set pieces", "Counters"])
+        self.assertEquals([len(post["comments"]) for post in exported["posts"]], [0, 0, 1])
+
+    def test_list_csv_export_streams_with_gzip_for_members_only(self):
+        action, simple_list = self.concord_client.get_method("add_list")(name="Roster", description="Who's playing")
+        self.concord_client.update_target_on_all(simple_list)
+        self.concord_client.get_method("add_column_to_list")(column_name="player", required=False, default_value="")
+        for player in ["Rapinoe", "Press"]:
+            self.concord_client.get_method("add_row_to_list")(row_content={"player": player})
+
+        url = reverse("export_as_csv", kwargs={"target": self.group.pk})
+        params = {"item_id": simple_list.pk, "item_model": "simplelist"}
+        response = self.client.get(url, params, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertTrue(response.streaming)
+        self.assertEquals(response["Content-Encoding"], "gzip")
+        rows = gzip.decompress(b"".join(response.streaming_content)).decode("utf-8").splitlines()
+        self.assertEquals(rows[1:], ["Rapinoe", "Press"])
+
+        User.objects.create_user("outsider", "shaunagm@gmail.com", "badlands2020")
+        self.client.login(username="outsider", password="badlands2020")
+        self.assertEquals(self.client.get(url, params).status_code, 403)
+
+    def test_export_job_runs_in_background_and_can_be_downloaded(self):
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        self.concord_client.update_target_on_all(forum)
+        self.concord_client.get_method("add_post")(title="Pressing", content="On pressing")
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            job = self.post("start_export_job", {"item_id": forum.pk, "item_model": "forum", "export_format": "json"},
+                            target=self.group.pk)["export_job"]
+            self.assertEquals(job["status"], "finished")
+            self.assertEquals(self.post("get_export_job", {"job_pk": job["pk"]}, target=self.group.pk)["export_job"],
+                              job)
+
+            response = self.client.get(job["download_url"])
+            exported = json.loads(b"".join(response.streaming_content))
+            self.assertEquals(exported, json.loads(forum.get_json_data()))
+
+            User.objects.create_user("outsider", "shaunagm@gmail.com", "badlands2020")
+            self.client.login(username="outsider", password="badlands2020")
+            self.assertEquals(self.client.get(job["download_url"]).status_code, 403)
+
+    def test_export_job_fails_when_its_artifact_is_missing(self):
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+
+        with tempfile.TemporaryDirectory() as worker_media_root, override_settings(MEDIA_ROOT=worker_media_root):
+            job = self.post("start_export_job", {"item_id": forum.pk, "item_model": "forum", "export_format": "json"},
+                            target=self.group.pk)["export_job"]
+
+        with tempfile.TemporaryDirectory() as web_media_root, override_settings(MEDIA_ROOT=web_media_root):
+            self.assertEquals(self.client.get(job["download_url"]).status_code, 404)
+            job = self.post("get_export_job", {"job_pk": job["pk"]}, target=self.group.pk)["export_job"]
+            self.assertEquals(job["status"], "failed")
+
+    def test_export_job_from_another_group_is_not_found(self):
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        other_group = self.concord_client.Community.create_community(name="NWSL")
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            job = self.post("start_export_job", {"item_id": forum.pk, "item_model": "forum", "export_format": "json"},
+                            target=self.group.pk)["export_job"]
+            for target, job_pk in [(other_group.pk, job["pk"]), (self.group.pk, job["pk"] + 1)]:
+                response = self.client.post(reverse("get_export_job", kwargs={"target": target}),
+                                            json.dumps({"job_pk": job_pk}), content_type="application/json")
+                self.assertEquals(response.status_code, 404)
+                response = self.client.get(reverse("download_export", kwargs={"target": target, "job_pk": job_pk}))
+                self.assertEquals(response.status_code, 404)
+
+    def test_group_snapshot_round_trip(self):
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        self.concord_client.update_target_on_all(forum)
+        action, post = self.concord_client.get_method("add_post")(title="Pressing", content="On pressing")
+        self.concord_client.update_target_on_all(post)
+        self.concord_client.get_method("add_comment")(text="Run at them")
+
+        forum_count = Forum.objects.count()
+        snapshot = io.BytesIO()
+        write_snapshot(self.group, snapshot)
+        lines = [json.loads(line) for line in gzip.decompress(snapshot.getvalue()).decode("utf-8").splitlines()]
+        self.assertEquals(lines[0]["model"], "groups.group")
+        labels = {line["model"] for line in lines}
+        self.assertTrue({"groups.forum", "groups.post", "resources.comment", "actions.action"} <= labels)
+
+        # remove everything in the snapshot, then restore it
+        for line in reversed(lines):
+            apps.get_model(line["model"]).objects.filter(pk=line["pk"]).delete()
+        self.assertFalse(Group.objects.filter(pk=self.group.pk).exists())
+        snapshot.seek(0)
+        counts = load_snapshot(snapshot)
+
+        self.assertEquals(sum(counts.values()), len(lines))
+        self.assertEquals(Group.objects.get(pk=self.group.pk).name, "USWNT")
+        self.assertEquals(Post.objects.get(pk=post.pk).title, "Pressing")
+        self.assertEquals(Forum.objects.count(), forum_count)   # no second governance forum from signals
+
+    def test_bootstrap_data_matches_individual_endpoints(self):
+        self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        self.concord_client.get_method("add_list")(name="Roster", description="Who's playing")
+        permissions = {"add_forum": {}, "add_role_to_community": {"role_name": "forwards"}}
+
+        bootstrap = self.post("get_bootstrap_data", {"permissions": permissions}, target=self.group.pk)
+
+        self.assertEquals(bootstrap["governance_data"], self.post("get_governance_data",
+                                                                  target=self.group.pk)["governance_data"])
+        self.assertEquals(bootstrap["permission_data"], self.post("get_permission_data", target=self.group.pk))
+        self.assertEquals(bootstrap["forums"], self.post("get_forum_data", target=self.group.pk)["forums"])
+        self.assertEquals(bootstrap["lists"], self.post("get_lists", target=self.group.pk)["lists"])
+        self.assertEquals(bootstrap["documents"], self.post("get_documents", target=self.group.pk)["documents"])
+        self.assertEquals(bootstrap["user_permissions"], self.post(
+            "check_permissions", {"permissions": permissions}, target=self.group.pk)["user_permissions"])
+
+    def test_search_users_by_prefix_in_pages(self):
+        for username in ["crystaldunn", "christenpress", "carlilloyd", "tobinheath"]:
+            User.objects.create_user(username, "shaunagm@gmail.com", "badlands2020")
+        User.objects.filter(username="carlilloyd").update(is_active=False)
+
+        response = self.post("search_users", {"query": "C", "page_size": 1})
+        self.assertEquals([user["name"] for user in response["users"]], ["christenpress"])
+        response = self.post("search_users", {"query": "C", "page_size": 1, "after": response["next_cursor"]})
+        self.assertEquals([user["name"] for user in response["users"]], ["crystaldunn"])
+        self.assertIsNone(response["next_cursor"])
+
+    def test_governance_data_only_includes_group_users(self):
+        member = User.objects.create_user("christenpress", "shaunagm@gmail.com", "badlands2020")
+        User.objects.create_user("outsider", "shaunagm@gmail.com", "badlands2020")
+        self.concord_client.Community.add_members_to_community(member_pk_list=[member.pk])
+        users = self.post("get_governance_data", target=self.group.pk)["governance_data"]["users"]
+        self.assertEquals(users, [{"name": "christenpress", "pk": member.pk},
+                                  {"name": "meganrapinoe", "pk": self.user.pk}])
+
+    def test_comment_threads_for_many_targets_in_pages(self):
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        self.concord_client.update_target_on_all(forum)
+        posts = [self.concord_client.get_method("add_post")(title=title, content=title)[1]
+                 for title in ["Pressing", "Counters", "Set pieces"]]
+        comment_pks = {}
+        for post, texts in zip(posts, [["Run at them", "Stay compact", "Win it back"], ["Go direct"], []]):
+            self.concord_client.update_target_on_all(post)
+            comment_pks[post.pk] = [self.concord_client.get_method("add_comment")(text=text)[1].pk for text in texts]
+
+        targets = [{"item_model": "post", "item_id": post.pk} for post in posts]
+        response = self.post("get_comment_threads", {"targets": targets, "page_size": 2})
+        threads = response["threads"]
+        self.assertEquals([thread["comment_pks"] for thread in threads],
+                          [comment_pks[posts[0].pk][1:], comment_pks[posts[1].pk], []])
+        self.assertEquals([bool(thread["next_cursor"]) for thread in threads], [True, False, False])
+        self.assertEquals(response["comments"][str(comment_pks[posts[1].pk][0])]["text"], "Go direct")
+
+        response = self.post("get_comment_threads", {"targets": targets[:1], "page_size": 2,
+                                                     "before": threads[0]["next_cursor"]})
+        self.assertEquals(response["threads"][0]["comment_pks"], comment_pks[posts[0].pk][:1])
+        self.assertIsNone(response["threads"][0]["next_cursor"])
+
+    def test_comment_threads_skip_unexposed_models(self):
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        self.concord_client.update_target_on_all(forum)
+        comment = self.concord_client.get_method("add_comment")(text="Run at them")[1]
+
+        targets = [{"item_model": "user", "item_id": self.user.pk}, {"item_model": "forum", "item_id": forum.pk}]
+        threads = self.post("get_comment_threads", {"targets": targets})["threads"]
+        self.assertEquals([thread["comment_pks"] for thread in threads], [[], [comment.pk]])
+        self.assertEquals(self.post("get_comment_threads", {"targets": []}), {"threads": [], "comments": {}})
+
+    def test_change_feed_returns_latest_change_per_item(self):
+        since = self.post("get_bootstrap_data", target=self.group.pk)["latest_sequence"]
+        forum = self.post("take_action", {"action_name": "add_forum", "name": "Tactics", "description": "Talk tactics",
+                                          "data_to_return": "created_instance"}, target=self.group.pk)
+        forum_pk = forum["created_instance"]["pk"]
+        self.post("take_action", {"action_name": "edit_forum", "alt_target": f"forum_{forum_pk}", "name": "Tactix",
+                                  "description": "Talk tactics"}, target=self.group.pk)
+        post = self.post("take_action", {"action_name": "add_post", "alt_target": f"forum_{forum_pk}",
+                                         "title": "Pressing", "content": "Press high",
+                                         "data_to_return": "created_instance"}, target=self.group.pk)
+        self.post("take_action", {"action_name": "delete_post", "alt_target": f"post_{post['created_instance']['pk']}"},
+                  target=self.group.pk)
+
+        response = self.post("get_changes", {"since": since}, target=self.group.pk)
+        changes = {(change["item_model"], change["item_id"]): change for change in response["changes"]}
+        self.assertEquals(changes[("forum", forum_pk)]["change"], "edited")
+        self.assertEquals(changes[("forum", forum_pk)]["item"]["name"], "Tactix")
+        self.assertEquals(changes[("post", post["created_instance"]["pk"])]["change"], "deleted")
+        self.assertFalse(response["has_more"])
+
+        response = self.post("get_changes", {"since": response["latest_sequence"]}, target=self.group.pk)
+        self.assertEquals(response["changes"], [])
+
+    def test_change_feed_numbers_each_groups_changes_from_one(self):
+        other_group = self.concord_client.Community.create_community(name="NWSL")
+        for group in [self.group, other_group, self.group]:
+            self.post("take_action", {"action_name": "add_forum", "name": "Tactics", "description": "Talk tactics"},
+                      target=group.pk)
+
+        for group in [self.group, other_group]:
+            sequences = list(ChangeLogEntry.objects.filter(group=group).order_by("sequence")
+                             .values_list("sequence", flat=True))
+            self.assertEquals(sequences, list(range(1, len(sequences) + 1)))
+            self.assertEquals(self.post("get_bootstrap_data", target=group.pk)["latest_sequence"], len(sequences))
+
+    def test_change_feed_logs_actions_not_taken_through_take_action(self):
+        action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        action, permission = self.concord_client.PermissionResource.add_permission(
+            change_type=Changes().Communities.AddRole, roles=["members"])
+        since = self.post("get_bootstrap_data", target=self.group.pk)["latest_sequence"]
+
+        self.concord_client.update_target_on_all(forum)
+        self.concord_client.get_method("edit_forum")(name="Tactix")
+        self.post("toggle_anyone", {"permission_id": permission.pk, "enable_or_disable": "enable"},
+                  target=self.group.pk)
+
+        changes = self.post("get_changes", {"since": since}, target=self.group.pk)["changes"]
+        self.assertEquals([(change["item_model"], change["item_id"], change["change"]) for change in changes],
+                          [("forum", forum.pk, "edited"), ("permissionsitem", permission.pk, "edited")])
+
+    def test_change_feed_logs_row_column_and_permission_changes(self):
+        simple_list = self.post("take_action", {"action_name": "add_list", "name": "Roster", "description": "Squad",
+                                                "data_to_return": "created_instance"}, target=self.group.pk)
+        list_pk = simple_list["created_instance"]["pk"]
+        action, permission = self.concord_client.PermissionResource.add_permission(
+            change_type=Changes().Communities.AddRole, roles=["members"])
+        since = self.post("get_bootstrap_data", target=self.group.pk)["latest_sequence"]
+
+        alt_target = f"simplelist_{list_pk}"
+        self.post("take_action", {"action_name": "add_column_to_list", "alt_target": alt_target,
+                                  "column_name": "position", "required": False, "default_value": ""},
+                  target=self.group.pk)
+        row = self.post("take_action", {"action_name": "add_row_to_list", "alt_target": alt_target,
+                                        "list_pk": list_pk, "row_content": {"position": "forward"},
+                                        "data_to_return": "unique_id"}, target=self.group.pk)
+        self.post("take_action", {"action_name": "delete_row_in_list", "alt_target": alt_target, "list_pk": list_pk,
+                                  "unique_id": row["unique_id"]}, target=self.group.pk)
+        self.post("take_action", {"action_name": "delete_column_from_list", "alt_target": alt_target,
+                                  "column_name": "position"}, target=self.group.pk)
+        self.post("take_action", {"action_name": "remove_permission", "alt_target": f"permissionsitem_{permission.pk}"},
+                  target=self.group.pk)
+
+        changes = self.post("get_changes", {"since": since}, target=self.group.pk)["changes"]
+        self.assertEquals([(change["item_model"], change["item_id"], change["change"]) for change in changes],
+                          [("simplelist", list_pk, "edited"), ("permissionsitem", permission.pk, "deleted")])
+        self.assertEquals(changes[0]["item"]["pk"], list_pk)
+
+    def test_change_feed_says_which_item_a_comment_is_on(self):
+        forum = self.post("take_action", {"action_name": "add_forum", "name": "Tactics", "description": "Talk tactics",
+                                          "data_to_return": "created_instance"}, target=self.group.pk)
+        forum_pk = forum["created_instance"]["pk"]
+        since = self.post("get_bootstrap_data", target=self.group.pk)["latest_sequence"]
+        comment = self.post("take_action", {"action_name": "add_comment", "alt_target": f"forum_{forum_pk}",
+                                            "text": "Run at them", "data_to_return": "created_instance"},
+                            target=self.group.pk)
+        comment_pk = int(list(comment["created_instance"])[0])
+
+        changes = self.post("get_changes", {"since": since}, target=self.group.pk)["changes"]
+        change = [change for change in changes if change["item_model"] == "comment"][0]
+        self.assertEquals((change["item_id"], change["change"]), (comment_pk, "created"))
+        self.assertEquals(change["item"][str(comment_pk)]["text"], "Run at them")
+        self.assertEquals((change["commented_item_model"], change["commented_item_id"]), ("forum", forum_pk))
+
+    def test_actions_are_published_to_group_event_subscribers_on_commit(self):
+        loop = asyncio.new_event_loop()
+        subscription = get_broker().subscribe(self.group.pk, loop=loop)
+        try:
+            with patch("groups.events.transaction") as transaction:
+                action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+            loop.run_until_complete(asyncio.sleep(0))
+            self.assertTrue(subscription.queue.empty())   # nothing's announced until the action is committed
+            for call in transaction.on_commit.call_args_list:
+                call[0][0]()
+            loop.run_until_complete(asyncio.sleep(0))   # deliver events handed to the loop
+            events = [subscription.queue.get_nowait() for i in range(subscription.queue.qsize())]
+        finally:
+            get_broker().unsubscribe(subscription)
+            loop.close()
+        self.assertIn(("action_created", action.pk), [(event["type"], event["action_pk"]) for event in events])
+        self.assertIn(("action_resolved", action.pk), [(event["type"], event["action_pk"]) for event in events])
+
+    @patch("groups.asgi.user_is_member", return_value=True)
+    def test_group_event_stream_sends_published_events(self, user_is_member):
+        with patch("groups.events.transaction") as transaction:
+            action, forum = self.concord_client.get_method("add_forum")(name="Tactics", description="Talk tactics")
+        sent = []
+
+        async def listen():
+            disconnected = asyncio.Event()
+
+            async def receive():
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent.append(message)
+                if message.get("more_body"):
+                    disconnected.set()
+
+            scope = {"type": "http", "method": "GET", "path": f"/groups/api/{self.group.pk}/events/", "headers": []}
+            stream = asyncio.ensure_future(route_group_events(None)(scope, receive, send))
+            while not sent:
+                await asyncio.sleep(0.01)
+            for call in transaction.on_commit.call_args_list:   # commit once the browser is listening
+                call[0][0]()
+            await asyncio.wait_for(stream, timeout=5)
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(listen())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+        self.assertEquals(sent[0]["status"], 200)
+        event = sent[1]["body"].decode("utf-8")
+        self.assertTrue(event.startswith("event: action_created\n"))
+        self.assertEquals(json.loads(event.split("data: ")[1])["action_pk"], action.pk)
+        self.assertEquals(get_broker().subscriptions.get(self.group.pk), None)
+
+    def test_group_event_stream_requires_login(self):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": f"/groups/api/{self.group.pk}/events/", "headers": []}
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(route_group_events(None)(scope, None, send))
+        loop.close()
+        self.assertEquals(sent[0]["status"], 403)
+
+    def test_take_actions_in_one_request(self):
+        actions = [{"action_name": "add_forum", "name": name, "description": name,
+                    "data_to_return": "created_instance"} for name in ["Tactics", "Fitness"]]
+        response = self.post("take_actions", {"actions": actions}, target=self.group.pk)
+        self.assertEquals(response["action_status"], "implemented")
+        self.assertEquals([action["created_instance"]["name"] for action in response["actions"]],
+                          ["Tactics", "Fitness"])
+        self.assertFalse(response["rolled_back"])
+
+    def test_take_actions_rolled_back_are_not_announced(self):
+        callbacks = len(connection.run_on_commit)
+        actions = [{"action_name": "add_forum", "name": "Set pieces", "description": "Corners"},
+                   {"action_name": "add_role_to_community", "role_name": "forwards"},
+                   {"action_name": "add_role_to_community", "role_name": "forwards"}]
+        response = self.post("take_actions", {"actions": actions, "all_or_nothing": True}, target=self.group.pk)
+        self.assertTrue(response["rolled_back"])
+        self.assertEquals(len(connection.run_on_commit), callbacks)   # events are dropped with the rollback
+
+    def test_take_actions_requires_a_list_of_actions(self):
+        add_forum = {"action_name": "add_forum", "name": "Tactics", "description": "Talk tactics"}
+        invalid_actions = [None, "add_forum", ["add_forum"], [{"name": "Tactics"}],
+                           [add_forum, {"action_name": "add_nonsense"}]]
+        for actions in invalid_actions:
+            request_data = {"actions": actions} if actions else {}
+            response = self.client.post(reverse("take_actions", kwargs={"target": self.group.pk}),
+                                        data=json.dumps(request_data), content_type="application/json")
+            self.assertEquals(response.status_code, 400)
+        self.assertFalse(Forum.objects.filter(name="Tactics").exists())
+
+    def test_take_actions_all_or_nothing_rolls_back(self):
+        actions = [{"action_name": "add_forum", "name": "Set pieces", "description": "Corners"},
+                   {"action_name": "add_role_to_community", "role_name": "forwards"},
+                   {"action_name": "add_role_to_community", "role_name": "forwards"},
+                   {"action_name": "add_forum", "name": "Never taken", "description": "Never taken"}]
+        response = self.post("take_actions", {"actions": actions, "all_or_nothing": True}, target=self.group.pk)
+        self.assertEquals(response["action_status"], "error")
+        self.assertTrue(response["rolled_back"])
+        self.assertEquals(len(response["actions"]), 3)
+        self.assertFalse(Forum.objects.filter(name__in=["Set pieces", "Never taken"]).exists())
+
+
+class ModelRegistryTestCase(TestCase):
+
+    def test_lookup_is_case_insensitive_and_limited_to_exposed_models(self):
+        self.assertIs(get_model("post"), Post)
+        self.assertIs(get_model("Forum"), Forum)
+        self.assertIs(get_model("GROUP"), Group)
+        self.assertIs(get_model("action"), Action)
+        self.assertEquals(get_model("TemplateModel")._meta.model_name, "templatemodel")
+        for model_name in ["user", "session", "exportjob", "approvalcondition", "notanymodel", None]:
+            with self.assertRaises(LookupError):
+                get_model(model_name)
@@ -0,0 +1,65 @@
+"""
+Builds the map of url names to urls that we pass to the Vue app.
+
+Reversing every route is slow, since most routes fail to reverse at least once and each failure raises
+an exception, so we only do it once per process.  We reverse each route using a placeholder in place of
+the target and save the result as a template.  Getting the url map for a specific group is then just a
+matter of substituting the group's pk into each template.
+"""
+
+from contextlib import suppress
+from functools import lru_cache
+
+from django.urls import get_resolver, exceptions
+
+
+TARGET_PLACEHOLDER = "8675309"   # must match the int converter used by <int:target> routes
+
+
+def reverse_urls(target=None):
+    """Reverses every named route under groups/, trying first without a target and then, if a target is
+    given, with one."""
+
+    resolver = get_resolver(None)
+    url_map = {}
+
+    for url_name in resolver.reverse_dict.keys():
+
+        if isinstance(url_name, str):
+
+            with suppress(exceptions.NoReverseMatch):
+                url = resolver.reverse(url_name)
+                url_map.update({url_name: url})
+                continue
+
+            with suppress(exceptions.NoReverseMatch):
+                if target:
+                    url = resolver.reverse(url_name, target=target)
+                    url_map.update({url_name: url})
+                    continue
+
+    return {key: value for key, value in url_map.items() if "groups/" in value}
+
+
+@lru_cache(maxsize=None)
+def get_url_templates():
+    """Returns a tuple of two dicts.  The first contains urls which don't require a target, the second contains
+    templates for urls which do, with TARGET_PLACEHOLDER standing in for the target."""
+
+    untargeted_urls = reverse_urls()
+    url_templates = {key: value for key, value in reverse_urls(target=TARGET_PLACEHOLDER).items()
+                     if key not in untargeted_urls}
+
+    return untargeted_urls, url_templates
+
+
+def get_urls(target=None):
+    """Gets map of url names to urls, substituting the target into the urls which require one."""
+
+    untargeted_urls, url_templates = get_url_templates()
+    url_map = dict(untargeted_urls)
+
+    if target:
+        url_map.update({key: value.replace(TARGET_PLACEHOLDER, str(target)) for key, value in url_templates.items()})
+
+    return url_map
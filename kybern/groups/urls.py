@@ -14,6 +14,9 @@ urlpatterns = [
     # Export views
     path('export/csv/<int:target>', views.export_as_csv, name="export_as_csv"),
     path('export/json/<int:target>', views.export_as_json, name="export_as_json"),
+    path('api/<int:target>/start_export_job/', views.start_export_job, name="start_export_job"),
+    path('api/<int:target>/get_export_job/', views.get_export_job, name="get_export_job"),
+    path('api/<int:target>/download_export/<int:job_pk>/', views.download_export, name="download_export"),
 
     # API/AJAX views
 
@@ -26,9 +29,14 @@ urlpatterns = [
     path('api/get_governance_data/<int:target>/', views.get_governance_data, name='get_governance_data'),
     path('api/get_permission_data/<int:target>/', views.get_permission_data, name='get_permission_data'),
     path('api/get_forum_data/<int:target>/', views.get_forum_data, name='get_forum_data'),
+    path('api/get_bootstrap_data/<int:target>/', views.get_bootstrap_data, name='get_bootstrap_data'),
+    path('api/search_users/', views.search_users, name='search_users'),
+    path('api/<int:target>/get_changes/', views.get_changes, name='get_changes'),
+    path('api/<int:target>/events/', views.group_events, name='group_events'),
 
     # dynamic views
     path('api/<int:target>/take_action', views.take_action, name='take_action'),
+    path('api/<int:target>/take_actions', views.take_actions, name='take_actions'),
     path('api/<int:target>/take_proposed_action', views.take_proposed_action, name='take_proposed_action'),
 
     # role & membership views
@@ -68,6 +76,7 @@ urlpatterns = [
 
     # comment views
     path('api/get_comment_data/', views.get_comment_data, name='get_comment_data'),
+    path('api/get_comment_threads/', views.get_comment_threads, name='get_comment_threads'),
 
     # template views
     path('api/get_templates_for_scope/', views.get_templates_for_scope, name='get_templates_for_scope'),
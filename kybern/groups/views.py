@@ -1,14 +1,22 @@
-import json, logging, csv
-from contextlib import suppress
+import json, logging
+from collections import OrderedDict
+from functools import lru_cache
 
-from django.urls import reverse, get_resolver, exceptions
-from django.apps import apps
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import PermissionDenied
 from django.db import transaction
+from django.db.models import F, Q, Window, prefetch_related_objects
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 from django.views import generic
-from django.http import HttpResponseRedirect, JsonResponse, HttpResponse
+from django.views.decorators.gzip import gzip_page
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse, FileResponse, Http404
+
+from django_q.tasks import async_task
 
 from concord.actions.models import TemplateModel
 from concord.resources.models import Comment, SimpleList, CommentCatcher
@@ -17,8 +25,16 @@ from concord.utils.lookups import get_all_dependent_fields
 from concord.utils.helpers import Client, Changes
 
 from accounts.models import User
-from .models import Group, Forum, Post
-from .decorators import reformat_input_data
+from .models import Group, Forum, Post, ExportJob
+from .decorators import reformat_input_data, reformat_request_data
+from .exports import iter_export
+from .memberships import get_memberships, get_role_holders
+from .change_feed import get_changes_since, get_latest_sequence
+from .model_registry import get_model
+from .pagination import encode_cursor, get_page_size, paginate_by_cursor
+from .permissions import (actor_satisfies_permission, has_permission, resolve_alt_target,
+                          check_permissions_in_bulk)
+from .url_map import get_urls
 
 
 logger = logging.getLogger(__name__)
@@ -29,44 +45,13 @@ logger = logging.getLogger(__name__)
 ##################################
 
 
-def get_urls(target=None):
-
-    resolver = get_resolver(None)
-    url_map = {}
-
-    for url_name in resolver.reverse_dict.keys():
-
-        if isinstance(url_name, str):
-
-            with suppress(exceptions.NoReverseMatch):
-                url = resolver.reverse(url_name)
-                url_map.update({url_name: url})
-                continue
-
-            with suppress(exceptions.NoReverseMatch):
-                if target:
-                    url = resolver.reverse(url_name, target=target)
-                    url_map.update({url_name: url})
-                    continue
-
-    return {key: value for key, value in url_map.items() if "groups/" in value}
-
-
 def generate_url_map(request, target=None):
     return JsonResponse({"urls": get_urls(target)})
 
 
-def get_model(model_name):
-    for app_config in apps.get_app_configs():
-        try:
-            model = app_config.get_model(model_name)
-            return model
-        except LookupError:
-            pass
-
-
-def process_action(action):
-    """Method for getting action data.  The action provided is always valid."""
+def process_action(action, conditions=None, template_descriptions=None):
+    """Method for getting action data.  The action provided is always valid.  When serializing many actions,
+    use process_actions instead, which passes in prefetched conditions and template descriptions."""
 
     if action.status == "implemented":
         action_verb = ""
@@ -83,12 +68,15 @@ def process_action(action):
 
     action_string = f"At {action_time}, {action.actor.username} {action_verb}{action_description}. {follow_up}"
 
-    conditions = Client().Conditional.get_condition_items_for_action(action_pk=action.pk)
+    if conditions is None:
+        conditions = Client().Conditional.get_condition_items_for_action(action_pk=action.pk)
 
     is_template = action.change.get_change_type() == Changes().Actions.ApplyTemplate
     template_info = action.get_template_info()
     if is_template:
-        template_info["full_description"] = TemplateModel.objects.get(name=template_info["name"]).user_description
+        if template_descriptions is None:
+            template_descriptions = get_template_descriptions([template_info["name"]])
+        template_info["full_description"] = template_descriptions[template_info["name"]]
 
     return {
         "action_pk": action.pk,
@@ -116,6 +104,38 @@ def process_action(action):
     }
 
 
+def get_template_descriptions(template_names):
+    """Gets a dict of template names to user descriptions in a single query."""
+    return dict(TemplateModel.objects.filter(name__in=set(template_names)).values_list("name", "user_description"))
+
+
+def get_conditions_for_actions(action_pks):
+    """Gets a dict of action pks to the condition items set on each action, with one query per condition type
+    rather than one query per condition type per action."""
+    conditions = {action_pk: [] for action_pk in action_pks}
+    for condition_class in Client().Conditional.get_possible_conditions():
+        for condition in condition_class.objects.filter(action__in=action_pks):
+            conditions[condition.action].append(condition)
+    return conditions
+
+
+def process_actions(actions):
+    """Bulk version of process_action.  Prefetches actors, content types, targets, conditions and template
+    models for all actions up front, so the number of queries doesn't grow with the number of actions."""
+
+    actions = list(actions)
+    prefetch_related_objects(actions, "actor", "content_type", "target")
+
+    conditions = get_conditions_for_actions([action.pk for action in actions])
+
+    template_names = [action.get_template_info()["name"] for action in actions
+                      if action.change.get_change_type() == Changes().Actions.ApplyTemplate]
+    template_descriptions = get_template_descriptions(template_names)
+
+    return [process_action(action, conditions=conditions[action.pk], template_descriptions=template_descriptions)
+            for action in actions]
+
+
 def get_action_dict(action, fetch_template_actions=False):
     """Helper method to unpack action information to make it readable for vue/javascript.  Note that
     unlike process_action, which is always called regarding existing actions, get_action_dict
@@ -141,7 +161,9 @@ def get_action_dict(action, fetch_template_actions=False):
     }
 
 
-def get_multiple_action_dicts(actions):
+def get_multiple_action_dicts(actions, action_dicts=None):
+    """Summarizes several actions.  Takes the actions' dicts if they've already been made, for instance with extra
+    data returned by process_taken_action."""
     # overall data
     action_log = ""
     action_status = "implemented"
@@ -150,22 +172,27 @@ def get_multiple_action_dicts(actions):
             action_status = "error"
             action_log += action.get_logs() if action.get_logs() else ""
     # individual action data
-    action_dicts_list = []
-    for action in actions:
-        action_dicts_list.append(get_action_dict(action))
+    if action_dicts is None:
+        action_dicts = [get_action_dict(action) for action in actions]
 
     return {
         "multiple_actions": True,
         "action_status": action_status,
         "action_log": action_log,
-        "actions": action_dicts_list
+        "actions": action_dicts
     }
 
 
-def serialize_existing_permission_for_vue(permission, pk_as_key=True):
+def serialize_existing_permission_for_vue(permission, pk_as_key=True, state_change=None):
     """  (note: this matches format specified in vuex store)
     permissions: {{permissions }},
-        // {int(pk) : {name: x, display: x, change_type: x } } """
+        // {int(pk) : {name: x, display: x, change_type: x } }
+
+    When serializing many permissions, use serialize_existing_permissions_for_vue, which prefetches permitted
+    objects and passes in a state change object shared by permissions with the same change type."""
+
+    if not state_change:
+        state_change = permission.get_state_change_object()
 
     if hasattr(permission.permitted_object, "is_community"):
         target = "community"
@@ -173,7 +200,7 @@ def serialize_existing_permission_for_vue(permission, pk_as_key=True):
         target = f"{permission.permitted_object.__class__.__name__} '{permission.permitted_object.get_name()}'"
 
     owner_permission = False
-    if permission.permitted_object.foundational_permission_enabled or permission.get_state_change_object().is_foundational:
+    if permission.permitted_object.foundational_permission_enabled or state_change.is_foundational:
         owner_permission = True
 
     governor_permission = not owner_permission and permission.permitted_object.governing_permission_enabled
@@ -194,7 +221,7 @@ def serialize_existing_permission_for_vue(permission, pk_as_key=True):
         "owner_permission": owner_permission,
         "governor_permission": governor_permission,
         "target": target,
-        "linked": permission.get_state_change_object().linked_filters
+        "linked": state_change.linked_filters
     }
 
     condition_data = permission.get_condition_data() if permission.has_condition() else None
@@ -205,14 +232,32 @@ def serialize_existing_permission_for_vue(permission, pk_as_key=True):
     return permission_dict
 
 
+def serialize_existing_permissions_for_vue(permissions):
+    """Bulk version of serialize_existing_permission_for_vue, returning a dict of pks to permission data.  Permitted
+    objects are fetched with one query per content type and state change objects are created once per change type."""
+
+    permissions = list(permissions)
+    prefetch_related_objects(permissions, "permitted_object")
+
+    state_changes, serialized_permissions = {}, {}
+    for permission in permissions:
+        if permission.change_type not in state_changes:
+            state_changes[permission.change_type] = permission.get_state_change_object()
+        serialized_permissions.update(
+            serialize_existing_permission_for_vue(permission, state_change=state_changes[permission.change_type]))
+
+    return serialized_permissions
+
+
 def serialize_existing_comment_for_vue(comment):
     """ Serializes comment from Django model to JSOn-serializable dict.
     (note: this matches format specified in vuex store)
     """
     return {
         comment.pk: {
-            'pk': comment.pk, 'text': comment.text, 'commenter_pk': comment.commenter.pk,
-            'created_at': comment.created_at, 'updated_at': comment.updated_at
+            'pk': comment.pk, 'text': comment.text, 'commenter_pk': comment.commenter_id,
+            'commenter_name': comment.commenter.username, 'created_at': comment.created_at,
+            'updated_at': comment.updated_at
         }
     }
 
@@ -221,11 +266,14 @@ def serialize_forum_for_vue(forum):
     return {'pk': forum.pk, 'name': forum.name, 'description': forum.description, 'special': forum.special}
 
 
-def serialize_post_for_vue(post):
-    return {
-        'pk': post.pk, 'title': post.title, 'content': post.content, 'forum_pk': post.forum.pk,
-        'created': post.created, 'author': post.author.pk
+def serialize_post_for_vue(post, summary=False):
+    post_dict = {
+        'pk': post.pk, 'title': post.title, 'forum_pk': post.forum_id, 'created': post.created,
+        'author': post.author_id, 'author_name': post.author.username
     }
+    if not summary:
+        post_dict['content'] = post.content
+    return post_dict
 
 
 def serialize_forums_for_vue(forums):
@@ -329,6 +377,12 @@ def get_governance_data(request, target):
     default_target = client.Community.get_community(community_pk=target)
     client.update_target_on_all(target=default_target)
 
+    return JsonResponse({"governance_data": get_governance_data_for_group(client)})
+
+
+def get_governance_data_for_group(client):
+    """Gets governance data for the group the client targets."""
+
     roles = [{'name': role_name, 'current_members': role_data}
              for role_name, role_data in client.Community.get_custom_roles().items()]
 
@@ -342,11 +396,32 @@ def get_governance_data(request, target):
         # role/member info
         "roles": roles,
         "current_members": [member.pk for member in client.Community.get_members()],
-        "users": [{'name': person.username, 'pk': person.pk} for person in User.objects.all()]
+        "users": [{'name': person.username, 'pk': person.pk} for person in
+                  User.objects.filter(pk__in=get_memberships(client.Community.target).keys()).order_by("username")]
 
     }
 
-    return JsonResponse({"governance_data": governance_data})
+    return governance_data
+
+
+@login_required
+def search_users(request):
+    """Gets a page of active users whose usernames start with the given query, in username order.  Pass in the
+    `next_cursor` from a previous response as `after` to get the next page."""
+
+    request_data = json.loads(request.body.decode('utf-8'))
+    page_size = get_page_size(request_data.get("page_size"))
+
+    users = User.objects.filter(username__istartswith=request_data.get("query", "")).order_by("username")
+    if request_data.get("after"):
+        users = users.filter(username__gt=request_data["after"])
+    users = list(users.values("pk", "username")[:page_size + 1])
+
+    next_cursor = users[page_size - 1]["username"] if len(users) > page_size else None
+    return JsonResponse({
+        "users": [{'name': user["username"], 'pk': user["pk"]} for user in users[:page_size]],
+        "next_cursor": next_cursor
+    })
 
 
 def get_permission_options(client):
@@ -408,6 +483,23 @@ def get_condition_options(client):
     return condition_options, condition_configuration
 
 
+@lru_cache(maxsize=None)
+def get_permission_catalog():
+    """Gets permission options, condition options and dependent field options.  These come from class-level state
+    change metadata, which only changes on deploy, so we build the catalog once per process.  Don't mutate it."""
+
+    client = Client()
+    permission_options = get_permission_options(client)
+    condition_options, condition_configuration_options = get_condition_options(client)
+
+    return {
+        "permission_options": permission_options,
+        "condition_options": condition_options,
+        "condition_configuration_options": condition_configuration_options,
+        "dependent_field_options": get_all_dependent_fields()
+    }
+
+
 @login_required
 def get_permission_data(request, target):
 
@@ -415,20 +507,20 @@ def get_permission_data(request, target):
     default_target = client.Community.get_community(community_pk=target)
     client.update_target_on_all(target=default_target)
 
-    permission_options = get_permission_options(client)
-    condition_options, condition_configuration_options = get_condition_options(client)
-    dependent_field_options = get_all_dependent_fields()
+    return JsonResponse(get_permission_data_for_group(client))
+
+
+def get_permission_data_for_group(client):
+    """Gets the permission catalog along with the leadership conditions of the group the client targets."""
+
     owner_condition = client.Community.get_condition_data(leadership_type="owner")
     governor_condition = client.Community.get_condition_data(leadership_type="governor")
 
-    return JsonResponse({
-        "permission_options": permission_options,
-        "condition_options": condition_options,
-        "condition_configuration_options": condition_configuration_options,
-        "dependent_field_options": dependent_field_options,
+    return {
+        **get_permission_catalog(),
         "owner_condition": owner_condition,
         "governor_condition": governor_condition
-    })
+    }
 
 
 @login_required
@@ -443,6 +535,69 @@ def get_forum_data(request, target):
     })
 
 
+@login_required
+def get_bootstrap_data(request, target):
+    """Gets everything the group detail page needs on load, which would otherwise take a request each: governance
+    data, permission data, forums, lists and documents.  Optionally takes permissions to check, in the format
+    check_permissions expects.  The community is loaded once and shared by all of them."""
+
+    request_data = json.loads(request.body.decode('utf-8')) if request.body else {}
+
+    client = Client(actor=request.user)
+    default_target = client.Community.get_community(community_pk=target)
+    client.update_target_on_all(target=default_target)
+
+    return JsonResponse({
+        "governance_data": get_governance_data_for_group(client),
+        "permission_data": get_permission_data_for_group(client),
+        "forums": serialize_forums_for_vue(client.Forum.get_forums_owned_by_target()),
+        "lists": serialize_lists_for_vue(client.List.get_all_lists_given_owner(owner=default_target)),
+        "documents": serialize_documents_for_vue(client.Document.get_all_documents_given_owner(owner=default_target)),
+        "user_permissions": check_permissions_in_bulk(request.user, default_target,
+                                                      request_data.get("permissions", {})),
+        "latest_sequence": get_latest_sequence(default_target.pk)
+    })
+
+
+@login_required
+def get_changes(request, target):
+    """Gets the items in the group created, edited or deleted since the sequence number passed in as `since`,
+    so the frontend can update its store without reloading everything.  Deleted items are returned without data."""
+
+    request_data = json.loads(request.body.decode('utf-8')) if request.body else {}
+
+    entries, latest_sequence, has_more = get_changes_since(
+        target, since=request_data.get("since"), page_size=request_data.get("page_size"))
+
+    pks_by_model = OrderedDict()
+    for entry in entries:
+        if entry.change != "deleted":
+            pks_by_model.setdefault(entry.item_model, []).append(entry.item_id)
+    items = {model_name: get_model(model_name).objects.in_bulk(pks) for model_name, pks in pks_by_model.items()}
+
+    changes = []
+    for entry in entries:
+        item = items.get(entry.item_model, {}).get(entry.item_id)
+        if entry.change != "deleted" and not item:
+            continue  # deleted since, by an action we'll see on a later page
+        change = {"item_model": entry.item_model, "item_id": entry.item_id, "change": entry.change,
+                  "sequence": entry.sequence, "item": serialize_item(item) if item else None}
+        if entry.item_model == "comment" and item:  # so the frontend can add it to the right thread
+            change["commented_item_model"] = ContentType.objects.get_for_id(
+                item.commented_object_content_type_id).model
+            change["commented_item_id"] = item.commented_object_id
+        changes.append(change)
+
+    return JsonResponse({"changes": changes, "latest_sequence": latest_sequence, "has_more": has_more})
+
+
+@login_required
+def group_events(request, target):
+    """Group events are streamed by the ASGI application (see groups.asgi), which handles this path before it
+    reaches Django.  So we only get here when served over WSGI, and tell the browser to fall back to polling."""
+    return HttpResponse("Group events are only available when served over ASGI.", status=503)
+
+
 #####################
 ### Dynamic Views ###
 #####################
@@ -462,6 +617,8 @@ def serialize_item(result):
         return serialize_document_for_vue(result)
     if result.__class__.__name__ == "PermissionsItem":
         return serialize_existing_permission_for_vue(result, pk_as_key=False)
+    if result.__class__.__name__ == "Group":
+        return {"pk": result.pk, "name": result.name, "description": result.group_description}
     print("Warning, no serializing match found for result: ", result)
 
 
@@ -492,22 +649,21 @@ def process_taken_action(action, result, target, data_to_return):
     return action_dict
 
 
-@login_required
-@reformat_input_data
-def take_action(request, target, request_data):
+def get_client_for_action_target(actor, target, alt_target=None):
+    """Gets a client targeting the community, unless alt_target is provided."""
 
-    # request_data = json.loads(request.body.decode('utf-8'))
-    client = Client(actor=request.user)
-
-    # set target as community, unless alt_target is provided
-    alt_target = request_data.pop("alt_target", None)
+    client = Client(actor=actor)
     if alt_target:
         model, pk = alt_target.split("_")
         target = client.Action.get_object_given_model_and_pk(model, int(pk), include_actions=True)
-        client.update_target_on_all(target=target)
     else:
         target = client.Community.get_community(community_pk=target)
-        client.update_target_on_all(target=target)
+    client.update_target_on_all(target=target)
+    return client, target
+
+
+def take_single_action(client, target, request_data):
+    """Takes the action described by request_data with the given client, returning its action dict."""
 
     data_to_return = request_data.pop("data_to_return", None)
     extra_data = request_data.pop("extra_data", None)
@@ -523,7 +679,58 @@ def take_action(request, target, request_data):
         action.note = note
         action.save()
 
-    return JsonResponse(process_taken_action(action, result, target, data_to_return))
+    return action, process_taken_action(action, result, target, data_to_return)
+
+
+@login_required
+@reformat_input_data
+def take_action(request, target, request_data):
+
+    client, target = get_client_for_action_target(request.user, target, request_data.pop("alt_target", None))
+    action, action_dict = take_single_action(client, target, request_data)
+    return JsonResponse(action_dict)
+
+
+def is_known_action(client, action_name):
+    try:
+        client.get_method(action_name)
+    except (AttributeError, KeyError):
+        return False
+    return True
+
+
+@login_required
+def take_actions(request, target):
+    """Takes an ordered list of actions against one target, in one transaction and with one client.  If
+    all_or_nothing is set, we stop at the first action which isn't implemented and roll back the ones before it."""
+
+    request_data = json.loads(request.body.decode('utf-8'))
+    action_list = request_data.get("actions")
+    if not isinstance(action_list, list) or not all(isinstance(action_data, dict) for action_data in action_list):
+        return JsonResponse({"error": "actions must be a list of actions to take"}, status=400)
+    all_or_nothing = request_data.get("all_or_nothing", False)
+
+    client, target = get_client_for_action_target(request.user, target, request_data.get("alt_target"))
+
+    for action_data in action_list:
+        action_name = action_data.get("action_name")
+        if not isinstance(action_name, str) or not is_known_action(client, action_name):
+            return JsonResponse({"error": f"Unknown action_name {action_name}"}, status=400)
+
+    actions, action_dicts, rolled_back = [], [], False
+    with transaction.atomic():
+        for action_data in action_list:
+            action, action_dict = take_single_action(client, target, reformat_request_data(action_data))
+            actions.append(action)
+            action_dicts.append(action_dict)
+            if all_or_nothing and action.status != "implemented":
+                transaction.set_rollback(True)
+                rolled_back = True
+                break
+
+    response = get_multiple_action_dicts(actions, action_dicts)
+    response["rolled_back"] = rolled_back
+    return JsonResponse(response)
 
 
 @login_required
@@ -596,18 +803,25 @@ def get_forum(request, target):
 
 @login_required
 def get_posts_for_forum(request, target):
+    """Gets a page of the forum's posts, newest first.  Pass in the `next_cursor` from a previous response as
+    `before` to get older posts.  If `summary` is set, post content is left out of the response."""
 
     request_data = json.loads(request.body.decode('utf-8'))
     forum_pk = request_data.get("forum_pk")
+    summary = request_data.get("summary", False)
 
     client = Client(actor=request.user)
     forum = client.Forum.get_forum_given_pk(forum_pk)
     client.Forum.set_target(target=forum)
-    posts = client.Forum.get_posts_for_forum()
+    posts = client.Forum.get_posts_for_forum().select_related("author")
+    if summary:
+        posts = posts.defer("content")
 
-    serialized_posts = [serialize_post_for_vue(post) for post in posts]
+    posts, next_cursor, latest_cursor = paginate_by_cursor(
+        posts, "created", before=request_data.get("before"), page_size=request_data.get("page_size"))
+    serialized_posts = [serialize_post_for_vue(post, summary=summary) for post in posts]
 
-    return JsonResponse({'forum_pk': forum_pk, 'posts': serialized_posts})
+    return JsonResponse({'forum_pk': forum_pk, 'posts': serialized_posts, 'next_cursor': next_cursor})
 
 
 @login_required
@@ -639,12 +853,9 @@ def get_permissions_given_role(actor, target, role_name):
 
     existing_permissions = client.PermissionResource.get_permissions_associated_with_role_for_target(role_name=role_name)
 
-    permission_pks, permissions = [], {}
-    for permission in existing_permissions:
-        permission_pks.append(permission.pk)
-        permissions.update(serialize_existing_permission_for_vue(permission))
+    permissions = serialize_existing_permissions_for_vue(existing_permissions)
 
-    return permission_pks, permissions
+    return list(permissions.keys()), permissions
 
 
 @transaction.non_atomic_requests
@@ -898,10 +1109,7 @@ def get_conditional_data(request):
     # for permission on condition, does user have permission?
     permission_details = {}
     for permission in client.PermissionResource.get_permissions_on_object(target_object=condition):
-        has_permission = client.PermissionResource.actor_satisfies_permission(
-            actor=request.user, permission=permission
-        )
-        permission_details.update({permission.change_type: has_permission})
+        permission_details.update({permission.change_type: actor_satisfies_permission(request.user, permission)})
     permission_details.update({'user_condition_status': condition.user_condition_status(user=request.user)})
 
     return JsonResponse({
@@ -927,6 +1135,8 @@ def get_action_data(request):
 
 @login_required
 def get_action_data_for_target(request):
+    """Gets a page of the action history for the given item.  Pass in the `next_cursor` from a previous response as
+    `before` to get older actions, or the `latest_cursor` as `since` to get only actions taken since then."""
 
     request_data = json.loads(request.body.decode('utf-8'))
 
@@ -935,9 +1145,13 @@ def get_action_data_for_target(request):
     target = model_class.objects.get(pk=item_id)
 
     client = Client(actor=request.user, target=target)
-    actions = client.Action.get_action_history_given_target()
+    actions, next_cursor, latest_cursor = paginate_by_cursor(
+        client.Action.get_action_history_given_target(), "created_at", before=request_data.get("before"),
+        since=request_data.get("since"), page_size=request_data.get("page_size"))
 
-    return JsonResponse({"action_data": [process_action(action) for action in actions]})
+    return JsonResponse({
+        "action_data": process_actions(actions), "next_cursor": next_cursor, "latest_cursor": latest_cursor
+    })
 
 
 ####################################
@@ -1020,15 +1234,12 @@ def get_permissions(request):
     else:
         existing_permissions = client.PermissionResource.get_all_permissions()
 
-    permission_pks, permissions = [], {}
-    for permission in existing_permissions:
-        permission_pks.append(permission.pk)
-        permissions.update(serialize_existing_permission_for_vue(permission))
+    existing_permissions = list(existing_permissions)
+    nested_permissions = list(client.PermissionResource.get_nested_permissions(target=target))
 
-    nested_pks = []
-    for permission in client.PermissionResource.get_nested_permissions(target=target):
-        nested_pks.append(permission.pk)
-        permissions.update(serialize_existing_permission_for_vue(permission))
+    permission_pks = [permission.pk for permission in existing_permissions]
+    nested_pks = [permission.pk for permission in nested_permissions]
+    permissions = serialize_existing_permissions_for_vue(existing_permissions + nested_permissions)
 
     return JsonResponse({
         "item_id": item_id, "item_model": request_data.get("item_model"), "permissions": permissions,
@@ -1125,6 +1336,91 @@ def get_comment_data(request):
     })
 
 
+def get_content_type_for_model_name(item_model):
+    try:
+        return ContentType.objects.get_for_model(get_model(item_model))
+    except LookupError:
+        return None
+
+
+def get_comment_threads_for_targets(targets, page_size=None):
+    """Takes a list of (item_model, item_id) tuples and gets the newest page of comments on each in one query,
+    grouping the targets by content type.  Returns a list of threads, each with the pks of its comments oldest
+    first and a cursor for fetching older comments, along with a dict of the comments themselves.  Targets whose
+    item_model isn't exposed get an empty thread, so they don't fail the rest of the batch."""
+
+    page_size = get_page_size(page_size)
+
+    content_types = [get_content_type_for_model_name(item_model) for item_model, item_id in targets]
+    ids_by_content_type = OrderedDict()
+    for content_type, (item_model, item_id) in zip(content_types, targets):
+        if content_type:
+            ids_by_content_type.setdefault(content_type, []).append(int(item_id))
+    if not ids_by_content_type:
+        return [{"item_id": item_id, "item_model": item_model, "comment_pks": [], "next_cursor": None}
+                for item_model, item_id in targets], {}
+
+    query = Q()
+    for content_type, ids in ids_by_content_type.items():
+        query |= Q(commented_object_content_type=content_type, commented_object_id__in=ids)
+
+    # number each target's comments newest first, and keep one more than a page of each, so that long threads
+    # aren't loaded in full.  Django can't filter on window functions yet, so we filter in an outer query.
+    ranked_comments = Comment.objects.filter(query).annotate(thread_position=Window(
+        expression=RowNumber(), partition_by=[F("commented_object_content_type"), F("commented_object_id")],
+        order_by=[F("created_at").desc(), F("pk").desc()])).values("pk", "thread_position")
+    sql, params = ranked_comments.query.sql_with_params()
+    page_pks = RawSQL(f"SELECT id FROM ({sql}) ranked_comments WHERE thread_position <= %s", (*params, page_size + 1))
+
+    comments_by_target = {}
+    for comment in Comment.objects.filter(pk__in=page_pks).select_related("commenter").order_by("-created_at", "-pk"):
+        key = (comment.commented_object_content_type_id, comment.commented_object_id)
+        comments_by_target.setdefault(key, []).append(comment)
+
+    threads, comments = [], {}
+    for content_type, (item_model, item_id) in zip(content_types, targets):
+        thread = comments_by_target.get((content_type.pk, int(item_id)), []) if content_type else []
+        page = thread[:page_size]
+        for comment in page:
+            comments.update(serialize_existing_comment_for_vue(comment))
+        threads.append({
+            "item_id": item_id, "item_model": item_model, "comment_pks": [comment.pk for comment in reversed(page)],
+            "next_cursor": encode_cursor(page[-1], "created_at") if len(thread) > page_size else None
+        })
+
+    return threads, comments
+
+
+@login_required
+def get_comment_threads(request):
+    """Gets comments for many items at once.  Takes `targets`, a list of dicts with item_model and item_id, and
+    returns the newest page of comments on each.  To get older comments on a single item, pass one target along
+    with that thread's `next_cursor` as `before`."""
+
+    request_data = json.loads(request.body.decode('utf-8'))
+    targets = [(target["item_model"], target["item_id"]) for target in request_data.get("targets", [])]
+    page_size = request_data.get("page_size")
+
+    if request_data.get("before") and len(targets) == 1:
+        item_model, item_id = targets[0]
+        content_type = get_content_type_for_model_name(item_model)
+        if not content_type:
+            return JsonResponse({"error": f"Can't get comments on {item_model}"}, status=400)
+        queryset = Comment.objects.filter(commented_object_content_type=content_type, commented_object_id=item_id)\
+            .select_related("commenter")
+        page, next_cursor, latest_cursor = paginate_by_cursor(queryset, "created_at",
+                                                              before=request_data["before"], page_size=page_size)
+        comments = {}
+        for comment in page:
+            comments.update(serialize_existing_comment_for_vue(comment))
+        threads = [{"item_id": item_id, "item_model": item_model,
+                    "comment_pks": [comment.pk for comment in reversed(page)], "next_cursor": next_cursor}]
+    else:
+        threads, comments = get_comment_threads_for_targets(targets, page_size=page_size)
+
+    return JsonResponse({"threads": threads, "comments": comments})
+
+
 ######################
 ### Template Views ###
 ######################
@@ -1216,40 +1512,19 @@ def update_leaders(client, pass_in_client, params, methods_to_try):
     return False
 
 
-def get_alt_target(client, params):
-    # create new client with new target if target is not community
-    alt_target = params.pop("alt_target", None) if params else None
-    if alt_target:
-        model, pk = alt_target.split("_")
-        if model == "action":
-            """Action is not a PermissionedModel but rarely gets set as target (through
-            comments mostly), we automatically give people access to Action comments"""
-            return "action"
-        return client.Action.get_object_given_model_and_pk(model, int(pk))
-
-
-def get_alt_target2(client, alt_target):
-    model, pk = alt_target.split("_")
-    if model == "action":
-        """Action is not a PermissionedModel but rarely gets set as target (through
-        comments mostly), we automatically give people access to Action comments"""
-        return "action"
-    return client.Action.get_object_given_model_and_pk(model, int(pk))
-
-
 def update_leadership_check(client, permission_name, params):
     """Temporary hack to handle the permissions check for update owners and update governors, which are not
     single state changes."""
     if permission_name == "update_owners":
         for perm in ["add_owner_to_community", "add_owner_role_to_community", "remove_owner_from_community",
             "remove_owner_role_from_community"]:
-            if client.PermissionResource.has_permission(client, perm, params, exclude_conditional=True):
+            if has_permission(client, client, perm, params):
                 return True
         return False
     if permission_name == "update_governors":
         for perm in ["add_governor_to_community", "add_governor_role_to_community", "remove_governor_from_community",
             "remove_governor_role_from_community"]:
-            if client.PermissionResource.has_permission(client, perm, params, exclude_conditional=True):
+            if has_permission(client, client, perm, params):
                 return True
         return False
 
@@ -1262,12 +1537,12 @@ def check_permission(request, target, permission_name, alt_target=None, params=N
     client = Client(actor=request.user)
 
     if alt_target:
-        target_to_use = get_alt_target2(client, alt_target)
+        target_to_use = resolve_alt_target(client, alt_target)
     else:
         target_to_use = client.Community.get_community(community_pk=target)
     client.update_target_on_all(target=target_to_use)
 
-    result = client.PermissionResource.has_permission(client, permission_name, params, exclude_conditional=True)
+    result = has_permission(client, client, permission_name, params)
 
     return JsonResponse({"user_permissions": {permission_name: result} })
 
@@ -1281,24 +1556,8 @@ def check_permissions(request, target, permissions):
     an alias. For each permission, check if we have it. Store result under alias if supplied.
     Returns a list of permission names with boolean values indicating whether user has the permissions."""
 
-    client = Client(actor=request.user)
-    default_target = client.Community.get_community(community_pk=target)
-    client.update_target_on_all(target=default_target)
-
-    permission_dict = {}
-    for permission_name, params in permissions.items():
-
-        pass_in_client = Client(actor=request.user, target=default_target)
-
-        alt_target = get_alt_target(client, params)
-        if alt_target == "action":
-            permission_dict.update({permission_name: True})
-            continue
-        if alt_target is not None:
-            pass_in_client.update_target_on_all(alt_target)
-
-        result = client.PermissionResource.has_permission(pass_in_client, permission_name, params, exclude_conditional=True)
-        permission_dict.update({permission_name: result})
+    default_target = Client(actor=request.user).Community.get_community(community_pk=target)
+    permission_dict = check_permissions_in_bulk(request.user, default_target, permissions)
 
     return JsonResponse({"user_permissions": permission_dict})
 
@@ -1308,39 +1567,99 @@ def check_permissions(request, target, permissions):
 ####################
 
 
-# NOTE: these export views need permission checks
+def get_item_to_export(request, target, item_model, item_id):
+    """Gets the item to export.  Only members of the group that owns the item may export it."""
 
+    model_class = get_model(item_model)
+    item = model_class.objects.get(pk=int(item_id))
 
-def export_as_csv(request, target):
-    """Returns an HTTP Response containing a CSV file. Default for exporting Lists."""
+    owner = item.get_owner()
+    if owner.pk != target or request.user.pk not in get_role_holders(owner, "members"):
+        raise PermissionDenied("Only members of the group can export its items")
 
-    # get object to export as CSV
-    model_class = get_model(request.GET.get("item_model"))
-    item = model_class.objects.get(pk=int(request.GET.get("item_id")))
+    return item
 
-    # export it
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="' + item.get_name() + '.csv"'
 
-    columns, dict_data = item.get_csv_data()
+@login_required
+@gzip_page
+def export_as_csv(request, target):
+    """Returns a streaming HTTP Response containing a CSV file. Default for exporting Lists."""
 
-    writer = csv.DictWriter(response, fieldnames=columns)
-    writer.writeheader()
-    for data in dict_data:
-        writer.writerow(data)
+    item = get_item_to_export(request, target, request.GET.get("item_model"), request.GET.get("item_id"))
+
+    response = StreamingHttpResponse(iter_export(item, "csv"), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="' + item.get_name() + '.csv"'
 
     return response
 
 
+@login_required
+@gzip_page
 def export_as_json(request, target):
-    """Returns an HTTP Response containing a CSV file. Default for exporting Forums."""
+    """Returns a streaming HTTP Response containing a JSON file. Default for exporting Forums."""
 
-    # get object to export as CSV
-    model_class = get_model(request.GET.get("item_model"))
-    item = model_class.objects.get(pk=int(request.GET.get("item_id")))
+    item = get_item_to_export(request, target, request.GET.get("item_model"), request.GET.get("item_id"))
 
-    # export it
-    response = HttpResponse(item.get_json_data(), content_type='application/json')
+    response = StreamingHttpResponse(iter_export(item, "json"), content_type='application/json')
     response['Content-Disposition'] = 'attachment; filename="' + item.get_name() + '.json"'
 
     return response
+
+
+def serialize_export_job_for_vue(job):
+    download_url = reverse("download_export", kwargs={"target": job.group_id, "job_pk": job.pk}) \
+        if job.status == "finished" else None
+    return {
+        "pk": job.pk, "item_id": job.item_id, "item_model": job.item_content_type.model,
+        "export_format": job.export_format, "status": job.status, "error": job.error, "created": job.created,
+        "finished": job.finished, "download_url": download_url
+    }
+
+
+def get_export_job_for_user(request, target, job_pk):
+    """Gets the export job, which only the user who started it can see."""
+    job = get_object_or_404(ExportJob.objects.select_related("item_content_type"), pk=job_pk, group_id=target)
+    if job.user_id != request.user.pk:
+        raise PermissionDenied("Export jobs can only be accessed by the user who started them")
+    return job
+
+
+@login_required
+def start_export_job(request, target):
+    """Queues an export of the item to run in the background.  Poll get_export_job until the job has finished,
+    then fetch the artifact from its download_url."""
+
+    request_data = json.loads(request.body.decode('utf-8'))
+    export_format = request_data.get("export_format")
+    if export_format not in dict(ExportJob.EXPORT_FORMAT_CHOICES):
+        return JsonResponse({"error": f"Unsupported export format {export_format}"}, status=400)
+
+    item = get_item_to_export(request, target, request_data.get("item_model"), request_data.get("item_id"))
+    job = ExportJob.objects.create(user=request.user, group_id=target, item=item, export_format=export_format)
+
+    from mysite.settings import TESTING
+    async_task('groups.tasks.run_export_job', job.pk, sync=TESTING)
+    job.refresh_from_db()
+
+    return JsonResponse({"export_job": serialize_export_job_for_vue(job)})
+
+
+@login_required
+def get_export_job(request, target):
+
+    request_data = json.loads(request.body.decode('utf-8'))
+    job = get_export_job_for_user(request, target, request_data.get("job_pk"))
+    job.check_artifact()
+
+    return JsonResponse({"export_job": serialize_export_job_for_vue(job)})
+
+
+@login_required
+def download_export(request, target, job_pk):
+    """Returns the artifact of a finished export job as a file download."""
+
+    job = get_export_job_for_user(request, target, job_pk)
+    if not job.check_artifact():
+        raise Http404("This export has not finished, or its file is no longer available")
+
+    return FileResponse(job.artifact.open("rb"), as_attachment=True, filename=job.get_filename())
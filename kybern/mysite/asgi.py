@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from groups.asgi import route_group_events  # noqa: E402, needs the apps to be loaded
+
+application = route_group_events(django_application)
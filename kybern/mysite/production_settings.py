@@ -18,6 +18,24 @@ db_from_env = dj_database_url.config(conn_max_age=500)
 DATABASES['default'] = db_from_env
 
 
+########################
+### Caching settings ###
+########################
+
+# Group memberships are cached across requests in memcached when MEMCACHED_SERVERS is set.  The cache is shared by
+# the web and worker processes, so a group's memberships cleared by one are cleared for all (see groups.memberships).
+# Without it, memberships are only memoized for the length of a request.
+
+if os.environ.get("MEMCACHED_SERVERS"):
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "memberships": {
+            "BACKEND": "django.core.cache.backends.memcached.MemcachedCache",
+            "LOCATION": os.environ["MEMCACHED_SERVERS"].split(","),
+        }
+    }
+
+
 ######################
 ### Email Settings ###
 ######################
@@ -69,6 +69,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'groups.middleware.PermissionCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'mysite.urls'
@@ -136,6 +137,12 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static/vue')
 ]
 
+# Uploaded and generated files, such as export artifacts, which are served through views rather than MEDIA_URL.
+# Export artifacts are written by the qcluster worker and read by the web processes, so in production, where they run
+# on separate dynos with their own ephemeral filesystems, DEFAULT_FILE_STORAGE must point at shared storage such as
+# S3.  Otherwise finished exports can't be downloaded, and are marked failed when someone tries.
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
 
 # Custom configurations
 
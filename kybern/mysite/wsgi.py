@@ -18,3 +18,7 @@ if path not in sys.path:
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
 
 application = get_wsgi_application()
+
+# build url map templates once per process, rather than on the first page load
+from groups.url_map import get_url_templates  # noqa: E402
+get_url_templates()
@@ -94,11 +94,16 @@ class BaseTestCase(StaticLiveServerTestCase):
                 return True
         return False
 
-    def select_from_multiselect(self, selection, element_css=".multiselect__element", search_within=None, index=0):
-        """Helper method to select options given the custom interface vue-multiselect provides."""
+    def select_from_multiselect(self, selection, element_css=".multiselect__element", search_within=None, index=0,
+                                search_text=None):
+        """Helper method to select options given the custom interface vue-multiselect provides.  Pass search_text
+        for multiselects which load their options from the server as the user types."""
         base = search_within if search_within else self.browser
         base.find_by_css(".multiselect__select")[index].click()
         time.sleep(.25)
+        if search_text:
+            base.find_by_css(".multiselect__input")[index].type(search_text)
+            time.sleep(2)
         for item in base.find_by_css(element_css):
             if selection in item.text:
                 item.click()
@@ -185,7 +190,7 @@ class BaseTestCase(StaticLiveServerTestCase):
         else:
             self.browser.find_by_id('add_members_display_button', wait_time=5).first.click()
         time.sleep(2)
-        self.select_from_multiselect(selection=member_name)
+        self.select_from_multiselect(selection=member_name, search_text=None if remove else member_name)
         self.take_action()
 
     def check_if_take_action_disabled(self, should_be_disabled=True, index=0, added_wait=0, alt_format=False):